@@ -1,57 +1,309 @@
+import argparse
 import json
+from concurrent.futures import ProcessPoolExecutor
 import ipaddress
 import logging
-
-# --- Logging setup ---
-logging.basicConfig(
-    filename="conversion.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+import os
+import re
+import sys
+import tempfile
+import time
+from json.encoder import encode_basestring_ascii as quote
 
 input_file = "raw-data.txt"
 output_file = "Json-Output.json"
 
 fields = ["Device_type", "IOS_type", "IP_Address", "Username", "Password"]
-devices = {}
 
-logging.info("Conversion started")
+# One INFO line per this many converted devices instead of one per device
+LOG_BATCH_SIZE = 10000
+
+# Parallel mode: size of the byte ranges handed to each worker process
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Dotted-quad IPv4 without leading zeros, same rules as ipaddress.ip_address
+# ([0-9] rather than \d, which also matches non-ASCII digits)
+IPV4_PATTERN = re.compile(
+    r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+    r"(?:\.(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])){3}")
+
+
+# --- Validation ---
+
+def is_valid_ip(ip):
+    """Fast path for IPv4 with a regex, ipaddress for everything else (IPv6)."""
+    if IPV4_PATTERN.fullmatch(ip):
+        return True
+    try:
+        ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return True
+
+
+def validate_line(line):
+    """Return (values, None) for a valid line or (None, reason) to skip it."""
+    values = line.split()
+
+    # Validate field count
+    if len(values) != 5:
+        return None, "wrong number of fields"
+
+    # Validate empty values
+    if not all(values):
+        return None, "empty field"
+
+    # Validate IP address
+    if not is_valid_ip(values[2]):
+        return None, f"invalid IP {values[2]}"
+
+    return values, None
+
+
+# --- Writers ---
+
+class JsonWriter:
+    """Write devices one by one, byte-identical to json.dump(devices, indent=4).
+
+    format() renders the fields of a device and does not depend on its
+    Device<N> name, so it can run in a worker process.
+    """
+
+    keys = [f"        {quote(key)}: " for key in fields]
+
+    def __init__(self, out_file):
+        self.out_file = out_file
+        self.count = 0
+
+    @classmethod
+    def format(cls, values):
+        return ",\n".join(key + quote(value) for key, value in zip(cls.keys, values))
+
+    def write(self, name, values):
+        self.write_body(name, self.format(values))
+
+    def write_body(self, name, body):
+        separator = ",\n" if self.count else "{\n"
+        self.out_file.write(f"{separator}    {quote(name)}: {{\n{body}\n    }}")
+        self.count += 1
+
+    def close(self):
+        self.out_file.write("\n}" if self.count else "{}")
+
+
+class NdjsonWriter:
+    """Write one JSON object per line: {"Device": "DeviceN", <fields>}."""
+
+    keys = [f", {quote(key)}: " for key in fields]
+
+    def __init__(self, out_file):
+        self.out_file = out_file
+        self.count = 0
+
+    @classmethod
+    def format(cls, values):
+        return "".join(key + quote(value) for key, value in zip(cls.keys, values))
+
+    def write(self, name, values):
+        self.write_body(name, self.format(values))
+
+    def write_body(self, name, body):
+        self.out_file.write(f'{{"Device": {quote(name)}{body}}}\n')
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+WRITERS = {"json": JsonWriter, "ndjson": NdjsonWriter}
+
+
+# --- Conversion ---
+
+def log_batch(first, last):
+    if last >= first:
+        logging.info(f"Device{first}-Device{last} added successfully")
+
+
+class DuplicateTracker:
+    """Remember the first line of every IP and report later repeats.
+
+    This keeps one entry per distinct IP, so it is the part of a conversion
+    whose memory grows with the inventory.
+    """
+
+    def __init__(self):
+        self.first_seen = {}
+        self.duplicates = 0
+
+    def check(self, ip, line_number):
+        first = self.first_seen.setdefault(ip, line_number)
+        if first != line_number:
+            self.duplicates += 1
+            logging.warning(f"Line {line_number} duplicate IP {ip} (first on line {first})")
+
+
+def chunk_ranges(path, chunk_size=None):
+    """Split path into (start, end) byte ranges that begin at a line start."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as raw:
+        start = 0
+        while start < size:
+            raw.seek(min(start + chunk_size, size))
+            raw.readline()
+            end = min(raw.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def validate_chunk(path, start, end, output_format):
+    """Validate one byte range, return (line_count, results).
+
+    results holds (local_line, ip, body) for valid lines, body being the
+    writer-formatted fields, and (local_line, None, reason) for skipped
+    ones; local line numbers start at 1 for the first line of the chunk.
+    """
+    with open(path, "rb") as raw:
+        raw.seek(start)
+        lines = raw.read(end - start).decode().split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    format_body = WRITERS[output_format].format
+    results = []
+    for local_line, line in enumerate(lines, start=1):
+        values, reason = validate_line(line)
+        if values is None:
+            results.append((local_line, None, reason))
+        else:
+            results.append((local_line, values[2], format_body(values)))
+    return len(lines), results
+
+
+def iter_chunks(path, output_format, workers):
+    """Yield validate_chunk results in file order, validating in a process pool.
+
+    At most 2 * workers chunks are in flight so finished but not yet merged
+    chunks do not pile up in memory.
+    """
+    ranges = chunk_ranges(path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for start, end in ranges:
+            pending.append(pool.submit(validate_chunk, path, start, end, output_format))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def convert(input_path, output_path, output_format="json", workers=1):
+    """Stream input_path into output_path, return the number of devices written.
+
+    Lines are validated and written as they are read, so the devices are
+    never all held in memory; only the IP -> first line map of the duplicate
+    check grows with the inventory. With workers > 1 the input is split into
+    byte ranges validated in parallel and merged back in file order, so the
+    Device<N> numbering is the same as in a serial run.
+    """
+    logging.info("Conversion started")
+    duplicates = DuplicateTracker()
+
+    with open(output_path, "w") as out_file:
+        writer = WRITERS[output_format](out_file)
+        batch_start = 1
+
+        def add(line_number, ip, body):
+            nonlocal batch_start
+            duplicates.check(ip, line_number)
+
+            # Store device
+            writer.write_body(f"Device{writer.count + 1}", body)
+
+            if writer.count % LOG_BATCH_SIZE == 0:
+                log_batch(batch_start, writer.count)
+                batch_start = writer.count + 1
+
+        if workers > 1:
+            line_offset = 0
+            for line_count, results in iter_chunks(input_path, output_format, workers):
+                for local_line, ip, body in results:
+                    if ip is None:
+                        logging.warning(f"Line {line_offset + local_line} skipped — {body}")
+                    else:
+                        add(line_offset + local_line, ip, body)
+                line_offset += line_count
+        else:
+            with open(input_path) as text:
+                for line_number, line in enumerate(text, start=1):
+                    values, reason = validate_line(line)
+                    if values is None:
+                        logging.warning(f"Line {line_number} skipped — {reason}")
+                        continue
+                    add(line_number, values[2], writer.format(values))
 
-with open(input_file) as text:
-    device_index = 1
+        log_batch(batch_start, writer.count)
+        writer.close()
 
-    for line_number, line in enumerate(text, start=1):
+    if duplicates.duplicates:
+        logging.warning(f"{duplicates.duplicates} lines reuse an IP address "
+                        f"already assigned to another device")
+    logging.info("Conversion completed successfully")
+    return writer.count
 
-        values = line.strip().split()
 
-        # Validate field count
-        if len(values) != 5:
-            logging.warning(f"Line {line_number} skipped — wrong number of fields")
-            continue
+# --- Benchmark ---
 
-        device_type, ios, ip, user, pwd = values
+def benchmark(lines, output_format, workers=1):
+    """Convert a synthetic inventory of `lines` lines and print the throughput."""
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = os.path.join(tmp, "raw-data.txt")
+        out_path = os.path.join(tmp, "output." + output_format)
+        with open(raw_path, "w") as raw:
+            for i in range(lines):
+                raw.write(f"switch ios 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255} "
+                          f"user{i} pass{i}\n")
 
-        # Validate empty values
-        if not all(values):
-            logging.warning(f"Line {line_number} skipped — empty field")
-            continue
+        start = time.perf_counter()
+        count = convert(raw_path, out_path, output_format, workers)
+        elapsed = time.perf_counter() - start
 
-        # Validate IP address
-        try:
-            ipaddress.ip_address(ip)
-        except ValueError:
-            logging.warning(f"Line {line_number} skipped — invalid IP {ip}")
-            continue
+    # resource is Unix only; ru_maxrss is in kilobytes on Linux, bytes on macOS
+    try:
+        import resource
+    except ImportError:
+        peak = "peak RSS n/a"
+    else:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_mb = peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        peak = f"peak RSS {peak_mb:.0f} MB"
+    print(f"{count} devices in {elapsed:.2f}s "
+          f"({count / elapsed:,.0f} lines/s, {output_format}, {workers} workers, {peak})")
 
-        # Store device
-        device_data = dict(zip(fields, values))
-        devices[f"Device{device_index}"] = device_data
 
-        logging.info(f"Device{device_index} added successfully")
-        device_index += 1
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert raw-data.txt into JSON")
+    parser.add_argument("-i", "--input", default=input_file)
+    parser.add_argument("-o", "--output", default=output_file)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="json",
+                        help="json (same layout as before) or ndjson")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="validate byte-range chunks in this many processes")
+    parser.add_argument("--benchmark", type=int, metavar="LINES",
+                        help="convert a synthetic inventory and print throughput")
+    args = parser.parse_args()
 
-# Write JSON output
-with open(output_file, "w") as out_file:
-    json.dump(devices, out_file, indent=4)
+    # --- Logging setup ---
+    logging.basicConfig(
+        filename="conversion.log",
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
 
-logging.info("Conversion completed successfully")
+    if args.benchmark:
+        benchmark(args.benchmark, args.format, args.workers)
+    else:
+        convert(args.input, args.output, args.format, args.workers)
@@ -0,0 +1,100 @@
+import ipaddress
+import json
+import os
+import time
+
+from dnsResolver import resolve_all
+
+# ==============================
+# Configuration
+# ==============================
+
+HOSTNAME_MAP_FILE = 'dns_hostnames.json'   # Persisted IP -> hostname map
+HOSTNAME_TTL = 24 * 3600                   # Keep resolved names for a day
+NEGATIVE_TTL = 3600                        # Retry unresolved IPs after an hour
+
+
+# ==============================
+# Functions
+# ==============================
+
+def unique_ips(values):
+    """Return the valid IP strings of values, deduplicated, in first-seen order."""
+    seen = {}
+    for value in values:
+        try:
+            ip = str(ipaddress.ip_address(str(value).strip()))
+        except ValueError:
+            continue
+        seen.setdefault(ip, None)
+    return list(seen)
+
+
+def load_hostname_map(path=HOSTNAME_MAP_FILE):
+    """Load the persisted map, dropping entries that have expired."""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as map_f:
+            entries = json.load(map_f)
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {ip: entry for ip, entry in entries.items() if entry.get('expires', 0) > now}
+
+
+def save_hostname_map(entries, path=HOSTNAME_MAP_FILE):
+    """Write the map atomically so an interrupted run never truncates it."""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as map_f:
+        json.dump(entries, map_f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def enrich(values, map_file=HOSTNAME_MAP_FILE, **resolver_kwargs):
+    """Resolve every distinct IP in values once and return {ip: hostname or None}.
+
+    IPs still valid in the persisted map (including negative entries for IPs
+    without a PTR record) are not queried again; the rest are resolved in
+    parallel with dnsResolver and written back to the map. IPs whose lookup
+    timed out are returned as None but not persisted, so they are retried
+    on the next run.
+    """
+    ips = unique_ips(values)
+    entries = load_hostname_map(map_file)
+    missing = [ip for ip in ips if ip not in entries]
+    names = {}
+
+    if missing:
+        now = time.time()
+        for result in resolve_all(missing, **resolver_kwargs):
+            hostname = result['hostname']
+            names[result['ip']] = hostname
+            if result['error'] and not hostname:
+                continue
+            ttl = HOSTNAME_TTL if hostname else NEGATIVE_TTL
+            entries[result['ip']] = {'hostname': hostname, 'expires': now + ttl}
+        save_hostname_map(entries, map_file)
+
+    return {ip: names[ip] if ip in names else entries[ip]['hostname']
+            for ip in ips}
+
+
+def annotate_graph(graph, names, attr='dns_name'):
+    """Set attr on every graph node (keyed by IP) that has a resolved name."""
+    for node, data in graph.nodes(data=True):
+        hostname = names.get(str(node))
+        if hostname:
+            data[attr] = hostname
+    return graph
+
+
+def annotate_records(records, names, ip_key='ip', attr='dns_name'):
+    """Set attr on every record dict whose ip_key has a resolved name."""
+    for record in records:
+        hostname = names.get(str(record.get(ip_key)))
+        if hostname:
+            record[attr] = hostname
+    return records
@@ -0,0 +1,423 @@
+import asyncio
+import ipaddress
+import random
+import socket
+import struct
+import threading
+import time
+
+# ==============================
+# Configuration
+# ==============================
+
+RESOLV_CONF = '/etc/resolv.conf'   # Where to read the system nameservers from
+DNS_PORT = 53                      # UDP port of the nameservers
+CONCURRENCY = 200                  # Max IPs resolved at the same time
+TIMEOUT = 2.0                      # Seconds to wait for a single answer
+RETRIES = 2                        # Extra attempts per query (next nameserver)
+NEGATIVE_TTL = 300                 # Seconds to remember NXDOMAIN / no answer
+
+# DNS record types and response codes used below
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_PTR = 12
+QTYPE_AAAA = 28
+QCLASS_IN = 1
+RCODE_OK = 0
+RCODE_NXDOMAIN = 3
+
+
+# ==============================
+# Wire format
+# ==============================
+
+def read_nameservers(path=RESOLV_CONF):
+    """Return the nameserver IPs listed in resolv.conf (fallback: 127.0.0.53)."""
+    servers = []
+    try:
+        with open(path) as conf:
+            for line in conf:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver':
+                    servers.append(parts[1].split('%')[0])
+    except OSError:
+        pass
+    return servers or ['127.0.0.53']
+
+
+def ptr_name(ip):
+    """Return the in-addr.arpa / ip6.arpa name for an IP address."""
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+def encode_name(name):
+    """Encode a dotted name as DNS labels."""
+    out = b''
+    for label in name.rstrip('.').split('.'):
+        if label:
+            out += bytes([len(label)]) + label.encode('idna')
+    return out + b'\x00'
+
+
+def build_query(qid, name, qtype):
+    """Build a recursive DNS query packet for a single question."""
+    header = struct.pack('!HHHHHH', qid, 0x0100, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack('!HH', qtype, QCLASS_IN)
+
+
+def decode_name(data, offset):
+    """Decode a (possibly compressed) name, return (name, next_offset)."""
+    labels = []
+    end = None
+    for _ in range(128):  # guard against compression loops
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            pointer = struct.unpack_from('!H', data, offset)[0] & 0x3FFF
+            if end is None:
+                end = offset + 2
+            offset = pointer
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode('ascii', 'replace'))
+        offset += length
+    return '.'.join(labels), (end if end is not None else offset)
+
+
+def parse_response(data):
+    """Parse a DNS response into (qid, rcode, answers).
+
+    answers is a list of (name, type, ttl, value) where value is a name for
+    PTR/CNAME records and an address string for A/AAAA records.
+    """
+    qid, flags, qdcount, ancount, _, _ = struct.unpack_from('!HHHHHH', data)
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = decode_name(data, offset)
+        offset += 4
+    answers = []
+    for _ in range(ancount):
+        name, offset = decode_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack_from('!HHIH', data, offset)
+        offset += 10
+        rdata = data[offset:offset + rdlength]
+        if rtype in (QTYPE_PTR, QTYPE_CNAME):
+            value = decode_name(data, offset)[0]
+        elif rtype in (QTYPE_A, QTYPE_AAAA):
+            value = str(ipaddress.ip_address(rdata))
+        else:
+            value = rdata
+        answers.append((name, rtype, ttl, value))
+        offset += rdlength
+    return qid, flags & 0x000F, answers
+
+
+# ==============================
+# Cache
+# ==============================
+
+class TTLCache:
+    """In-process cache whose entries expire after their DNS TTL.
+
+    Expired entries are dropped when they are looked up, and all of them
+    are swept at most every `purge_interval` seconds when entries are added,
+    so names that are never asked for again do not stay in memory.
+    """
+
+    def __init__(self, purge_interval=60):
+        self._entries = {}
+        self.purge_interval = purge_interval
+        self._next_purge = time.monotonic() + purge_interval
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl):
+        now = time.monotonic()
+        if now >= self._next_purge:
+            self.purge(now)
+        self._entries[key] = (now + ttl, value)
+
+    def purge(self, now=None):
+        """Drop every expired entry."""
+        now = time.monotonic() if now is None else now
+        self._entries = {key: entry for key, entry in self._entries.items()
+                         if entry[0] >= now}
+        self._next_purge = now + self.purge_interval
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ==============================
+# Resolver
+# ==============================
+
+def _address(host, port):
+    """Normalized (ip, port) of a socket address, to compare reply sources."""
+    return ipaddress.ip_address(host.split('%')[0]), port
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    """Hand UDP answers to the query waiting for their id.
+
+    pending maps a query id to (future, (server ip, port)); a reply is only
+    accepted from the nameserver the query was sent to.
+    """
+
+    def __init__(self, pending):
+        self.pending = pending
+
+    def datagram_received(self, data, addr):
+        try:
+            qid, rcode, answers = parse_response(data)
+            source = _address(*addr[:2])
+        except (struct.error, IndexError, ValueError):
+            return
+        future, server = self.pending.get(qid, (None, None))
+        if future is None or source != server:
+            return
+        del self.pending[qid]
+        if not future.done():
+            future.set_result((rcode, answers))
+
+    def error_received(self, exc):
+        # pending is shared by the sockets of both families, so the queries
+        # sent on the other one fail too and are retried like after a timeout
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.pending.clear()
+
+
+class DnsTimeout(OSError):
+    """No nameserver answered a query (timeouts or server failures).
+
+    Unlike NXDOMAIN or an empty answer, this says nothing about the name,
+    so the result must not be cached.
+    """
+
+
+class AsyncResolver:
+    """Resolve PTR and forward records concurrently over one UDP socket per
+    address family.
+
+    Answers are matched by query id and source address, at most
+    `concurrency` IPs are in flight, concurrent queries for the same name
+    share one request and answers are cached for their TTL (NXDOMAIN and
+    empty answers for NEGATIVE_TTL).
+    """
+
+    def __init__(self, nameservers=None, port=DNS_PORT, concurrency=CONCURRENCY,
+                 timeout=TIMEOUT, retries=RETRIES, cache=None):
+        self.nameservers = nameservers or read_nameservers()
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = cache if cache is not None else TTLCache()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._transports = {}
+        self._pending = {}
+        self._inflight = {}
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        families = {ipaddress.ip_address(ns).version for ns in self.nameservers}
+        for family in sorted(families):
+            local = ('::', 0) if family == 6 else ('0.0.0.0', 0)
+            self._transports[family], _ = await loop.create_datagram_endpoint(
+                lambda: _DnsProtocol(self._pending), local_addr=local)
+        return self
+
+    def close(self):
+        for transport in self._transports.values():
+            transport.close()
+        self._transports = {}
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    async def query(self, name, qtype):
+        """Return the answers for name/qtype, [] when nothing was found.
+
+        Raises DnsTimeout when no nameserver answered.
+        """
+        key = (name.lower(), qtype)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Callers asking for a name already being resolved wait for the
+        # same answer instead of sending their own query
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._query(name, qtype, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _query(self, name, qtype, key):
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            server = self.nameservers[attempt % len(self.nameservers)]
+            address = _address(server, self.port)
+            qid = random.getrandbits(16)
+            while qid in self._pending:
+                qid = random.getrandbits(16)
+            future = loop.create_future()
+            self._pending[qid] = (future, address)
+            self._transports[address[0].version].sendto(
+                build_query(qid, name, qtype), (server, self.port))
+            try:
+                rcode, answers = await asyncio.wait_for(future, self.timeout)
+            except (asyncio.TimeoutError, OSError):
+                self._pending.pop(qid, None)
+                continue
+            if rcode not in (RCODE_OK, RCODE_NXDOMAIN):
+                continue
+            wanted = [a for a in answers if a[1] in (qtype, QTYPE_CNAME)]
+            ttl = min((a[2] for a in wanted), default=NEGATIVE_TTL)
+            self.cache.set(key, wanted, ttl)
+            return wanted
+        raise DnsTimeout(f"No answer for {name} from {', '.join(self.nameservers)}")
+
+    async def reverse(self, ip):
+        """PTR lookup, return the hostname or None."""
+        for _, rtype, _, value in await self.query(ptr_name(ip), QTYPE_PTR):
+            if rtype == QTYPE_PTR:
+                return value
+        return None
+
+    async def forward(self, hostname):
+        """A and AAAA lookups in parallel, return (aliases, addresses)."""
+        results = await asyncio.gather(self.query(hostname, QTYPE_A),
+                                       self.query(hostname, QTYPE_AAAA))
+        aliases, addresses = [], []
+        for answers in results:
+            for name, rtype, _, value in answers:
+                if rtype == QTYPE_CNAME:
+                    if name not in aliases:
+                        aliases.append(name)
+                elif value not in addresses:
+                    addresses.append(value)
+        return aliases, addresses
+
+    async def lookup(self, ip):
+        """Resolve one IP into a dict with hostname, aliases and addresses.
+
+        error is None, or 'timeout' when a query got no answer; the hostname
+        is then None, or the aliases and addresses incomplete.
+        """
+        hostname, aliases, addresses, error = None, [], [], None
+        async with self._semaphore:
+            try:
+                hostname = await self.reverse(ip)
+                if hostname:
+                    aliases, addresses = await self.forward(hostname)
+            except DnsTimeout:
+                error = 'timeout'
+        return {'ip': ip, 'hostname': hostname, 'aliases': aliases,
+                'addresses': addresses or [ip], 'error': error}
+
+    async def lookup_many(self, ips):
+        """Resolve all IPs concurrently, results keep the input order."""
+        return await asyncio.gather(*(self.lookup(ip) for ip in ips))
+
+
+def resolve_all(ips, **kwargs):
+    """Blocking helper: resolve a list of IPs and return the result dicts."""
+    async def _run():
+        async with AsyncResolver(**kwargs) as resolver:
+            return await resolver.lookup_many(ips)
+    return asyncio.run(_run())
+
+
+# ==============================
+# Stub server (tests / offline demos)
+# ==============================
+
+class StubDnsServer:
+    """Tiny threaded UDP DNS server answering from a dict.
+
+    records maps IP -> hostname; PTR queries for those IPs and A/AAAA
+    queries for those hostnames are answered, everything else gets
+    NXDOMAIN. Every received question is appended to `queries`.
+
+        with StubDnsServer({'10.1.1.1': 'sw1.lab'}) as stub:
+            resolve_all(['10.1.1.1'], nameservers=['127.0.0.1'], port=stub.port)
+    """
+
+    def __init__(self, records, ttl=60, host='127.0.0.1'):
+        self.ttl = ttl
+        self.queries = []
+        self._ptr = {ptr_name(ip): name for ip, name in records.items()}
+        self._forward = {}
+        for ip, name in records.items():
+            self._forward.setdefault(name.lower(), []).append(ipaddress.ip_address(ip))
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, 0))
+        self._sock.settimeout(0.2)
+        self.port = self._sock.getsockname()[1]
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def _answer(self, rtype, rdata):
+        return b'\xc0\x0c' + struct.pack('!HHIH', rtype, QCLASS_IN, self.ttl,
+                                          len(rdata)) + rdata
+
+    def _reply(self, data):
+        qid = struct.unpack_from('!H', data)[0]
+        name, offset = decode_name(data, 12)
+        qtype = struct.unpack_from('!H', data, offset)[0]
+        self.queries.append((name, qtype))
+        answers = []
+        if qtype == QTYPE_PTR and name in self._ptr:
+            answers.append(self._answer(QTYPE_PTR, encode_name(self._ptr[name])))
+        elif qtype in (QTYPE_A, QTYPE_AAAA):
+            version = 4 if qtype == QTYPE_A else 6
+            for address in self._forward.get(name.lower(), []):
+                if address.version == version:
+                    answers.append(self._answer(qtype, address.packed))
+        known = name in self._ptr or name.lower() in self._forward
+        rcode = RCODE_OK if known else RCODE_NXDOMAIN
+        header = struct.pack('!HHHHHH', qid, 0x8180 | rcode, 1, len(answers), 0, 0)
+        return header + data[12:offset + 4] + b''.join(answers)
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            try:
+                data, addr = self._sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self._sock.sendto(self._reply(data), addr)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -6,6 +6,9 @@ from datetime import datetime
 from netmiko import ConnectHandler
 from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
 
+from dnsEnrich import enrich
+from inventoryStore import InventoryStore
+
 # ==============================
 # Configuration
 # ==============================
@@ -16,6 +19,8 @@ SSH_PASSWORD = 'PhilipsR00t!'     # SSH password
 TELNET_PASSWORD = 'm3150'         # Telnet password
 TELNET_SECRET = 'm3150e'          # Telnet enable password
 OUTPUT_DIR = 'switch_outputs'     # Base directory for outputs
+RESOLVE_DNS = True                # Reverse-resolve all device IPs in one parallel batch
+DNS_HOSTNAME_MAP = 'dns_hostnames.json'  # Persisted (negative-cached) IP -> name map
 
 # Commands to run on each device
 COMMANDS = [
@@ -35,6 +40,17 @@ SPECIFIC_DEVICES = [
       '172.31.200.3',
 ]
 
+# ----------------------------------------------------------
+# OPTIONAL: Select devices from the indexed inventory store
+# ----------------------------------------------------------
+# Build it once with: python inventoryStore.py build
+# When INVENTORY_STORE is set it takes precedence over SPECIFIC_DEVICES.
+# Filter values may be a single value or a list, e.g. {'IOS_type': ['ios']}.
+INVENTORY_STORE = None            # e.g. 'inventory.store'
+INVENTORY_FILTER = {
+      'IOS_type': 'ios',
+}
+
 
 # ==============================
 # Functions
@@ -110,8 +126,14 @@ def connect_device(ip, protocol='ssh'):
 # ==============================
 
 def main():
-    # Determine mode: subnet or specific devices
-    if SPECIFIC_DEVICES:
+    # Determine mode: inventory store, specific devices or subnet
+    if INVENTORY_STORE:
+        with InventoryStore(INVENTORY_STORE) as inventory:
+            records = inventory.select(**INVENTORY_FILTER)
+        device_list = [ipaddress.ip_address(record['IP_Address']) for record in records]
+        print(f"Running on {len(device_list)} devices selected from {INVENTORY_STORE} "
+              f"with filter {INVENTORY_FILTER}.")
+    elif SPECIFIC_DEVICES:
         device_list = [ipaddress.ip_address(ip) for ip in SPECIFIC_DEVICES]
         print(f"Running on {len(device_list)} manually specified devices.")
     else:
@@ -129,6 +151,12 @@ def main():
         summary_f.write(f"Summary of Commands Run on Devices\n")
         summary_f.write(f"Generated on: {datetime.now()}\n\n")
 
+    # Resolve every device IP once, in parallel, before connecting
+    dns_names = {}
+    if RESOLVE_DNS:
+        dns_names = enrich(device_list, map_file=DNS_HOSTNAME_MAP)
+        print(f"Resolved {sum(1 for n in dns_names.values() if n)}/{len(dns_names)} device IPs via DNS.")
+
     successful_connections = 0
 
     for ip in device_list:
@@ -159,6 +187,7 @@ def main():
             hostname = get_hostname(conn)
             safe_hostname = sanitize_filename(hostname)
             print(f"  Hostname: {hostname}")
+            dns_name = dns_names.get(ip_str) or 'unresolved'
 
             # Create per-device folder
             device_folder = os.path.join(output_dir, safe_hostname)
@@ -168,6 +197,7 @@ def main():
             hostname_file = os.path.join(device_folder, f"{safe_hostname}.txt")
             with open(hostname_file, 'w') as host_f:
                 host_f.write(f"Output for {hostname} ({ip_str}) via {connection_type}\n")
+                host_f.write(f"DNS name: {dns_name}\n")
                 host_f.write(f"Generated on: {datetime.now()}\n\n")
 
                 all_outputs = []
@@ -177,7 +207,7 @@ def main():
                     host_f.write(f"Command: {cmd}\n")
                     host_f.write("-" * 50 + "\n")
                     host_f.write(output + "\n\n")
-                    all_outputs.append(f"\n--- {hostname} ({ip_str}, {connection_type}) ---\nCommand: {cmd}\n{output}")
+                    all_outputs.append(f"\n--- {hostname} ({ip_str}, {dns_name}, {connection_type}) ---\nCommand: {cmd}\n{output}")
 
                 with open(summary_file, 'a') as summary_f:
                     summary_f.writelines(all_outputs)
@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+from array import array
+
+# ==============================
+# Configuration
+# ==============================
+
+SOURCE_FILE = 'Json-Output.json'   # Output of ScriptJsnLogging.py (json or ndjson)
+STORE_FILE = 'inventory.store'     # Indexed store built from it
+
+# Fields looked up through an on-disk hash table (one entry per device)
+HASHED_FIELDS = ['Device', 'IP_Address']
+# Low-cardinality fields with a posting list of devices per value
+CATEGORY_FIELDS = ['Device_type', 'IOS_type']
+
+MAGIC = b'INVSTORE1\n'
+SLOT = struct.Struct('<QQ')        # (hash of value, record offset + 1)
+TRAILER = struct.Struct('<Q')      # offset of the JSON header
+
+
+# ==============================
+# Build
+# ==============================
+
+def read_devices(path):
+    """Yield device records from a ScriptJsnLogging.py output (json or ndjson)."""
+    with open(path) as source:
+        first_line = source.readline().strip()
+        source.seek(0)
+        if first_line in ('{', '{}'):
+            for name, device in json.load(source).items():
+                record = {'Device': name}
+                record.update(device)
+                yield record
+        else:
+            # ndjson: one {"Device": ..., fields...} object per line
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def value_hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+def build_store(source=SOURCE_FILE, store=STORE_FILE):
+    """Write the records of source plus their indexes into store, return the count."""
+    offsets = []
+    hashed = {field: [] for field in HASHED_FIELDS}
+    postings = {field: {} for field in CATEGORY_FIELDS}
+
+    with open(store, 'wb') as out:
+        out.write(MAGIC)
+
+        # Records, one JSON line each
+        for record in read_devices(source):
+            offset = out.tell()
+            out.write(json.dumps(record).encode() + b'\n')
+            offsets.append(offset)
+            for field in HASHED_FIELDS:
+                hashed[field].append((value_hash(str(record.get(field, ''))), offset))
+            for field in CATEGORY_FIELDS:
+                postings[field].setdefault(str(record.get(field, '')), array('Q')).append(offset)
+
+        header = {'version': 1, 'count': len(offsets), 'hashed': {}, 'postings': {}}
+
+        # Posting lists: packed record offsets per field value
+        for field, values in postings.items():
+            header['postings'][field] = {}
+            for value, entries in values.items():
+                header['postings'][field][value] = [out.tell(), len(entries)]
+                out.write(entries.tobytes())
+
+        # Open addressing hash tables, sized to stay at most half full
+        for field, entries in hashed.items():
+            slots = 1
+            while slots < 2 * len(entries):
+                slots *= 2
+            table = bytearray(slots * SLOT.size)
+            for digest, offset in entries:
+                slot = digest & (slots - 1)
+                while SLOT.unpack_from(table, slot * SLOT.size)[1]:
+                    slot = (slot + 1) & (slots - 1)
+                SLOT.pack_into(table, slot * SLOT.size, digest, offset + 1)
+            header['hashed'][field] = [out.tell(), slots]
+            out.write(table)
+
+        header_offset = out.tell()
+        out.write(json.dumps(header).encode())
+        out.write(TRAILER.pack(header_offset))
+
+    return len(offsets)
+
+
+# ==============================
+# Query
+# ==============================
+
+class InventoryStore:
+    """Memory-mapped, read-only view of a store written by build_store().
+
+    Only the small JSON header is parsed when opening; records are decoded on
+    demand from the mapping, hashed fields are looked up in O(1) and category
+    fields through their posting lists.
+
+        with InventoryStore('inventory.store') as inventory:
+            inventory.by_ip('10.1.1.1')
+            inventory.select(IOS_type='ios', Device_type=['switch', 'router'])
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an inventory store")
+        header_offset = TRAILER.unpack_from(self._map, len(self._map) - TRAILER.size)[0]
+        self.header = json.loads(self._map[header_offset:len(self._map) - TRAILER.size])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.header['count']
+
+    def record(self, offset):
+        """Decode the record stored at offset."""
+        end = self._map.find(b'\n', offset)
+        return json.loads(self._map[offset:end])
+
+    def values(self, field):
+        """Distinct values of a category field."""
+        return list(self.header['postings'][field])
+
+    def _hashed_offsets(self, field, value):
+        table_offset, slots = self.header['hashed'][field]
+        digest = value_hash(value)
+        slot = digest & (slots - 1)
+        found = []
+        while True:
+            slot_digest, offset = SLOT.unpack_from(self._map, table_offset + slot * SLOT.size)
+            if not offset:
+                return found
+            if slot_digest == digest and str(self.record(offset - 1).get(field)) == value:
+                found.append(offset - 1)
+            slot = (slot + 1) & (slots - 1)
+
+    def _posting_offsets(self, field, value):
+        entry = self.header['postings'][field].get(value)
+        if entry is None:
+            return []
+        start, count = entry
+        return memoryview(self._map)[start:start + count * 8].cast('Q').tolist()
+
+    def offsets(self, field, value):
+        """Record offsets whose field equals value."""
+        if field in self.header['hashed']:
+            return self._hashed_offsets(field, str(value))
+        if field in self.header['postings']:
+            return self._posting_offsets(field, str(value))
+        raise KeyError(f"'{field}' is not indexed, use one of "
+                       f"{HASHED_FIELDS + CATEGORY_FIELDS}")
+
+    def by_ip(self, ip):
+        offsets = self._hashed_offsets('IP_Address', str(ip))
+        return self.record(offsets[0]) if offsets else None
+
+    def by_name(self, name):
+        offsets = self._hashed_offsets('Device', name)
+        return self.record(offsets[0]) if offsets else None
+
+    def select(self, **criteria):
+        """Records matching every criterion, in inventory order.
+
+        A criterion value may be a single value or a list of accepted values.
+        """
+        if not criteria:
+            return list(self)
+        selected = None
+        for field, wanted in criteria.items():
+            if isinstance(wanted, (str, int)):
+                wanted = [wanted]
+            matches = set()
+            for value in wanted:
+                matches.update(self.offsets(field, value))
+            selected = matches if selected is None else selected & matches
+            if not selected:
+                return []
+        return [self.record(offset) for offset in sorted(selected)]
+
+    def __iter__(self):
+        offset = len(MAGIC)
+        for _ in range(len(self)):
+            end = self._map.find(b'\n', offset)
+            yield json.loads(self._map[offset:end])
+            offset = end + 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query the indexed device inventory')
+    parser.add_argument('-s', '--store', default=STORE_FILE)
+    sub = parser.add_subparsers(dest='action', required=True)
+    build = sub.add_parser('build', help='index the ScriptJsnLogging.py output')
+    build.add_argument('-i', '--input', default=SOURCE_FILE)
+    query = sub.add_parser('query', help='print the devices matching all filters')
+    for field in HASHED_FIELDS + CATEGORY_FIELDS:
+        query.add_argument(f'--{field}', action='append')
+    args = parser.parse_args()
+
+    if args.action == 'build':
+        count = build_store(args.input, args.store)
+        print(f"Indexed {count} devices into {args.store}")
+    else:
+        criteria = {field: getattr(args, field) for field in HASHED_FIELDS + CATEGORY_FIELDS
+                    if getattr(args, field)}
+        with InventoryStore(args.store) as inventory:
+            for record in inventory.select(**criteria):
+                print(json.dumps(record))
@@ -0,0 +1,138 @@
+from collections.abc import Mapping
+
+
+class ExclusionTrie(object):
+    '''Exclusions of a diff, compiled once.
+
+    An exclusion is either a key name, excluded at any depth like with
+    genie's Diff, or a path given as a list of keys, e.g.
+    ['info', 'vrf', 'default', 'router_id'], only excluded there. Paths are
+    stored as a trie, so walking down a structure only follows the trie
+    node of the current path instead of checking every exclusion at every
+    key.
+    '''
+
+    _compiled = {}
+
+    def __init__(self, exclude=()):
+        self.names = set()
+        self.root = {}
+        for exclusion in exclude:
+            if isinstance(exclusion, (list, tuple)):
+                node = self.root
+                for key in exclusion[:-1]:
+                    node = node.setdefault(key, {})
+                # None marks the end of an excluded path
+                node.setdefault(exclusion[-1], {})[None] = True
+            else:
+                self.names.add(exclusion)
+
+    @classmethod
+    def of(cls, exclude):
+        '''Shared compiled trie of an exclude list'''
+        key = tuple(tuple(e) if isinstance(e, list) else e for e in exclude)
+        try:
+            return cls._compiled[key]
+        except KeyError:
+            return cls._compiled.setdefault(key, cls(exclude))
+
+    def child(self, node, key):
+        '''(excluded, trie node below key) from the trie node of a path'''
+        if key in self.names:
+            return True, None
+        below = node.get(key) if node else None
+        if below is not None and None in below:
+            return True, None
+        return False, below
+
+
+def _fields(value):
+    '''Mapping to compare for the Ops objects: their attributes'''
+    if isinstance(value, Mapping):
+        return value
+    return vars(value)
+
+
+class FastDiff(object):
+    '''Diff of two structures or Ops objects, exiting early.
+
+    Same use as genie's Diff for pass/fail checks:
+
+        diff = FastDiff(ops1, ops2, exclude=exclude, limit=20)
+        diff.findDiff()
+        if diff.diffs:
+            ...
+
+    The attributes of the two objects are compared, nested dicts key by
+    key and anything else as a value. Equal branches are skipped with one
+    comparison: an identity check, then ==, which Python runs in C and
+    stops at the first difference, so only branches that do differ are
+    walked key by key. The walk stops once limit differences were found
+    (all of them by default); truncated then tells whether it stopped
+    early.
+
+    The == of a differing branch is repeated at each level walked down to
+    its differences, each time up to the first one. A difference depth
+    levels deep thus costs up to depth comparisons of its branch, O(size x
+    depth) in the worst case instead of the O(size) of a plain walk. This
+    is the price of skipping equal branches, usually most of the structure,
+    in C.
+
+    diffs is a list of (path, before, after), before or after being
+    MISSING for keys only on one side.
+    '''
+
+    MISSING = type('Missing', (), {'__repr__': lambda self: '<missing>'})()
+
+    def __init__(self, obj1, obj2, exclude=None, limit=None):
+        self.obj1 = obj1
+        self.obj2 = obj2
+        self.trie = ExclusionTrie.of(exclude or [])
+        self.limit = limit
+        self.diffs = []
+        self.truncated = False
+
+    def findDiff(self):
+        self.diffs = []
+        self.truncated = False
+        missing = self.MISSING
+        stack = [((), _fields(self.obj1), _fields(self.obj2), self.trie.root)]
+        while stack:
+            path, fields1, fields2, node = stack.pop()
+            if not isinstance(fields1, Mapping) or \
+               not isinstance(fields2, Mapping):
+                # Differing values, e.g. leaves, lists or nested objects
+                self.diffs.append((path, fields1, fields2))
+            else:
+                for key in fields1.keys() | fields2.keys():
+                    excluded, below = self.trie.child(node, key)
+                    if excluded:
+                        continue
+                    value1 = fields1.get(key, missing)
+                    value2 = fields2.get(key, missing)
+                    if value1 is value2:
+                        continue
+                    if value1 is missing or value2 is missing:
+                        self.diffs.append((path + (key,), value1, value2))
+                    elif value1 != value2:
+                        stack.append((path + (key,), value1, value2, below))
+            if self.limit is not None and len(self.diffs) >= self.limit:
+                self.truncated = bool(stack) or len(self.diffs) > self.limit
+                del self.diffs[self.limit:]
+                break
+        return self.diffs
+
+    def __bool__(self):
+        return bool(self.diffs)
+
+    def __str__(self):
+        lines = []
+        for path, before, after in self.diffs:
+            name = '.'.join(str(key) for key in path)
+            if before is not self.MISSING:
+                lines.append('-{}: {!r}'.format(name, before))
+            if after is not self.MISSING:
+                lines.append('+{}: {!r}'.format(name, after))
+        if self.truncated:
+            lines.append('... stopped after {} differences'.format(self.limit))
+        return '\n'.join(lines)
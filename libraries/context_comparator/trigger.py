@@ -1,5 +1,8 @@
 import time
+import logging
 import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
 from pyats import aetest
 from genie.harness.base import Trigger
@@ -8,42 +11,106 @@ from genie.ops.base import Context
 
 # Genie Libs
 from genie.libs import parser
-from genie.utils.diff import Diff
 
 from genie.abstract import Lookup
 
+from .fast_diff import FastDiff
+
+log = logging.getLogger(__name__)
+
 default_exclude = ['maker', 'context_manager']
 
+# Ops learnt in this job, by device, command and context, so another
+# testcase comparing the same command does not learn it again
+_learned = {}
+_learned_lock = threading.Lock()
+
+# Parser classes resolved by _load_pkg, by abstraction tokens and class
+_resolved = {}
+_resolved_lock = threading.Lock()
+resolution_stats = {'hits': 0, 'misses': 0}
+
+# Learns the second context while the first one is learnt, shared by all the
+# testcases of the job
+_executor = ThreadPoolExecutor(thread_name_prefix='context2')
+
+
+def _is_pooled(uut):
+    '''True when the uut default connection is a pyATS connection pool,
+    which runs commands from several threads at once'''
+    connection = getattr(getattr(uut, 'connectionmgr', None), 'default', None)
+    return type(connection).__name__ == 'ConnectionPool'
+
+
+def _separate_connections(uut, context1, context2):
+    '''True when the uut mapping sends the two contexts to different
+    connections'''
+    mapping = getattr(uut, 'mapping', None) or {}
+    via1, via2 = mapping.get(context1), mapping.get(context2)
+    return via1 is not None and via2 is not None and via1 != via2
+
+
+def _can_run_concurrently(uut, context1, context2):
+    '''Two learns can only share the uut when its connection is pooled or
+    when each context has its own connection'''
+    return _is_pooled(uut) or _separate_connections(uut, context1, context2)
+
 
 class Comparator(Trigger):
 
     @aetest.test
-    def context1(self, uut, cmd, context1, section):
-        '''Learn the first context'''
+    def context1(self, uut, cmd, context1, context2, section,
+                 concurrent=None, use_cache=True):
+        '''Learn the first context, and the second one at the same time
+        when the uut connection is pooled or each context has its own'''
         section.id = 'context_{}'.format(context1)
 
-        context = getattr(Context, context1)
-        self.context1_ops = self._learn(uut, cmd, context)
+        self.context2_future = None
+        allowed = _can_run_concurrently(uut, context1, context2)
+        if concurrent and not allowed:
+            log.warning("'{c1}' and '{c2}' share a single connection to {d}, "
+                        "learning them one after the other".format(
+                            c1=context1, c2=context2, d=uut.name))
+        if allowed and concurrent is not False:
+            self.context2_future = _executor.submit(
+                self._learn_cached, uut, cmd, context2, use_cache)
+
+        self.context1_ops = self._learn_cached(uut, cmd, context1, use_cache)
         if not self.context1_ops.name:
+            # context2 is skipped too, so it must not keep using the uut
+            self._discard_context2()
             self.skipped("{} command is invalid or output is empty".\
                         format(context1), goto=['next_tc'])
 
     @aetest.test
-    def context2(self, uut, cmd, context2, section):
+    def context2(self, uut, cmd, context2, section, use_cache=True):
         '''Learn the second context'''
         section.id = 'context_{}'.format(context2)
 
-        context = getattr(Context, context2)
         try:
-            self.context2_ops = self._learn(uut, cmd, context)
+            if self.context2_future is not None:
+                self.context2_ops = self.context2_future.result()
+            else:
+                self.context2_ops = self._learn_cached(uut, cmd, context2,
+                                                       use_cache)
         except:
-            self.failed("invalid {} command".format(context2), goto=['next_tc'])
+            self.failed("invalid {} command".format(context2),
+                        goto=['next_tc'])
+
+    def _discard_context2(self):
+        '''Cancel the second context learn, or wait for it when it already
+        started'''
+        future, self.context2_future = self.context2_future, None
+        if future is not None and not future.cancel():
+            wait([future])
 
     @aetest.test
-    def compare(self, uut, cmd, context1, context2, exclude=[]):
+    def compare(self, uut, cmd, context1, context2, exclude=[], max_diffs=50):
         '''Compare between the two contexts'''
         exclude = default_exclude + exclude
-        diff = Diff(self.context1_ops, self.context2_ops, exclude=exclude)
+        # Stops after max_diffs differences, enough to fail and report
+        diff = FastDiff(self.context1_ops, self.context2_ops, exclude=exclude,
+                        limit=max_diffs)
         diff.findDiff()
 
         # Verify that all keys are present
@@ -52,6 +119,25 @@ class Comparator(Trigger):
                         "command '{cmd}'\n{e}".format(c1=context1, c2=context2,
                                                       e=str(diff), cmd=cmd))
 
+    def _learn_cached(self, uut, cmd, context_name, use_cache=True):
+        '''Learn the command for a context, or reuse the ops learnt by an
+        earlier testcase of this job'''
+        key = (uut.name, cmd['pkg'], cmd['class'], context_name,
+               tuple(sorted(cmd.get('parameters', {}).items())))
+        if use_cache:
+            with _learned_lock:
+                ops = _learned.get(key)
+            if ops is not None:
+                log.info("Reusing the {c} output learnt earlier for "
+                         "'{cls}'".format(c=context_name, cls=cmd['class']))
+                return ops
+
+        ops = self._learn(uut, cmd, getattr(Context, context_name))
+        if ops.name:
+            with _learned_lock:
+                _learned[key] = ops
+        return ops
+
     def _learn(self, uut, cmd, context):
         '''Learn the specific show command via an Genie Ops object'''
         # Load the command
@@ -72,16 +158,34 @@ class Comparator(Trigger):
 
         cls = cmd['class']
         pkg = cmd['pkg']
+
+        # The class only depends on the abstraction tokens Lookup uses for
+        # the device and on the command, so it is resolved once per job for
+        # each of them
+        tokens = Lookup.tokens_from_device(uut)
+        key = (tuple(tokens), pkg, cls)
+        with _resolved_lock:
+            lib = _resolved.get(key)
+            if lib is not None:
+                resolution_stats['hits'] += 1
+                return lib
+
         mod = importlib.import_module(name=pkg)
 
         # Lookup is cached,  so only the first time will be slow
         # Otherwise it is fast
-        lib = Lookup.from_device(uut, packages={pkg:mod})
+        lib = Lookup(*tokens, packages={pkg:mod})
         # Build the class to used to call
         keys = cls.split('.')
         keys.insert(0, pkg)
-        for key in keys:
-            lib = getattr(lib, key) 
+        for key_ in keys:
+            lib = getattr(lib, key_)
+
+        with _resolved_lock:
+            resolution_stats['misses'] += 1
+            lib = _resolved.setdefault(key, lib)
+        log.debug('Resolved {pkg}.{cls} for {t}: {lib} ({s})'.format(
+            pkg=pkg, cls=cls, t=tokens, lib=lib, s=resolution_stats))
         return lib
 
 
@@ -0,0 +1,47 @@
+# Python
+import time
+import logging
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+PollResult = namedtuple('PollResult', 'converged value elapsed attempts')
+
+
+def poll_until(fetch, converged, timeout=60, interval=1, max_interval=10,
+               backoff=2, clock=time.monotonic, sleep=time.sleep):
+    '''Call fetch() until converged(value) is true or timeout expires.
+
+    Instead of sleeping for the worst case and checking once, the state is
+    fetched right away, then again after interval seconds. While fetches
+    return the same value the wait grows by backoff, up to max_interval;
+    as soon as the value changes, the device is making progress and the
+    wait goes back to interval. The last wait is cut to end on the
+    deadline.
+
+    Returns PollResult(converged, value, elapsed, attempts), value being
+    the last fetched one, so the caller can report what did not converge.
+    '''
+    start = clock()
+    deadline = start + timeout
+    wait = interval
+    previous = None
+    attempts = 0
+    while True:
+        value = fetch()
+        attempts += 1
+        elapsed = clock() - start
+        if converged(value):
+            log.info('Converged after {:.1f}s and {} attempts'.format(elapsed,
+                                                                  attempts))
+            return PollResult(True, value, elapsed, attempts)
+        remaining = deadline - clock()
+        if remaining <= 0:
+            log.info('Not converged after {:.1f}s and {} attempts'.format(
+                elapsed, attempts))
+            return PollResult(False, value, elapsed, attempts)
+        if attempts > 1:
+            wait = min(wait * backoff, max_interval) if value == previous \
+                   else interval
+        previous = value
+        sleep(min(wait, remaining))
@@ -0,0 +1,155 @@
+# Python
+import pickle
+import hashlib
+import logging
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+SnapshotDiff = namedtuple('SnapshotDiff', 'added removed changed')
+
+
+def _hashable(value):
+    '''Value as nested tuples, dicts and sets in a canonical order'''
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted(((key, _hashable(item)) for key, item in value.items()),
+                            key=repr))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((_hashable(item) for item in value), key=repr))
+    return value
+
+
+def _digest(leaves):
+    '''Digest of an entry's leaves, the same in every process'''
+    # hash() of strings is salted per process, which would make the
+    # digests of a saved snapshot differ from the ones of a new capture
+    canonical = repr(sorted(leaves.items(), key=repr))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+def _entries(output, path):
+    '''(key, value) of the entries found at path, '*' matching any key'''
+    if not path:
+        yield from output.items()
+        return
+    key, rest = path[0], path[1:]
+    values = output.values() if key == '*' else \
+        [output[key]] if key in output else []
+    for value in values:
+        if isinstance(value, dict):
+            yield from _entries(value, rest)
+
+
+def _leaves(value, path, fields, leaves):
+    '''Flatten value into leaves {path below the entry: leaf value}'''
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            _leaves(item, path + (key,), fields, leaves)
+    elif fields is None or (path and path[-1] in fields):
+        leaves[path] = _hashable(value)
+    return leaves
+
+
+class Snapshot(object):
+    '''Parsed output captured for a later pre/post comparison.
+
+    Each key found at the entries path of the parsed output (an address, a
+    mac, a route) is an entry, stored as its flattened leaves {path: value}
+    along with a digest of them. Comparing two snapshots looks each entry
+    up by key and only compares the leaves of entries whose digests differ,
+    instead of walking both nested outputs.
+
+        arp = 'interfaces/*/ipv4/neighbors'
+        initial = Snapshot.capture(ShowIpArp(device=uut).parse(),
+                                   fields=['age'], entries=arp)
+        ...
+        diff = initial.diff(Snapshot.capture(ShowIpArp(device=uut).parse(),
+                                             fields=['age'], entries=arp))
+        diff.removed
+
+    entries is a '/' separated path, or a sequence of keys, where '*'
+    matches any key; the entry keys must be unique across what '*'
+    matches. Without it, each top level key is an entry. fields keeps only
+    the leaves with these names, e.g. the ones a trigger verifies.
+    Snapshots can be saved to disk and loaded in a later section or job.
+    '''
+
+    def __init__(self, entries=None):
+        # key: (digest, {path: value})
+        self.entries = entries or {}
+
+    @classmethod
+    def capture(cls, output, fields=None, entries=None):
+        fields = frozenset(fields) if fields is not None else None
+        if isinstance(entries, str):
+            entries = [key for key in entries.split('/') if key]
+        captured = {}
+        for key, value in _entries(output, tuple(entries or ())):
+            leaves = _leaves(value, (), fields, {})
+            if leaves:
+                captured[key] = (_digest(leaves), leaves)
+        return cls(captured)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __eq__(self, other):
+        # Compares the digests only, like diff()
+        return isinstance(other, Snapshot) and len(self) == len(other) and \
+            all(other.entries.get(key, (None,))[0] == digest
+                for key, (digest, _) in self.entries.items())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def get(self, key, path=(), default=None):
+        '''Leaf at path of entry key, or default'''
+        entry = self.entries.get(key)
+        if entry is None:
+            return default
+        return entry[1].get(tuple(path), default)
+
+    def leaves(self, key):
+        return dict(self.entries[key][1])
+
+    def diff(self, after):
+        '''SnapshotDiff from this snapshot to after.
+
+        added and removed are sets of entry keys, changed maps each changed
+        entry key to {path: (value before, value after)}.
+        '''
+        before_entries, after_entries = self.entries, after.entries
+        added = set(after_entries.keys() - before_entries.keys())
+        removed = set(before_entries.keys() - after_entries.keys())
+        changed = {}
+        for key, (digest, leaves) in before_entries.items():
+            other = after_entries.get(key)
+            # Equal digests are taken as equal entries
+            if other is None or other[0] == digest:
+                continue
+            other_leaves = other[1]
+            changes = {path: (leaves.get(path), other_leaves.get(path))
+                       for path in leaves.keys() | other_leaves.keys()
+                       if leaves.get(path) != other_leaves.get(path)}
+            if changes:
+                changed[key] = changes
+        return SnapshotDiff(added, removed, changed)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        log.info('Saved snapshot of {n} entries to {p}'.format(n=len(self),
+                                                              p=path))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(pickle.load(f))
@@ -1,5 +1,4 @@
 # Python
-import time
 import logging
 
 # pyATS
@@ -14,6 +13,10 @@ from genie.libs.parser.nxos.show_arp import ShowIpArp
 # Metaparser exception
 from genie.metaparser.util.exceptions import SchemaEmptyParserError
 
+# Trigger utilities
+from .poll import poll_until
+from .snapshot import Snapshot
+
 log = logging.getLogger(__name__)
 
 # Steps in this Trigger
@@ -21,6 +24,33 @@ log = logging.getLogger(__name__)
 # clear ip arp vrf all force-delete
 # Verify they all came back - And uptime was reduced
 
+
+def age_seconds(age):
+    '''Arp age in seconds, from seconds or HH:MM:SS; None for static (-)'''
+    if isinstance(age, int):
+        return age
+    if age == '-':
+        return None
+    seconds = 0
+    for part in str(age).split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def fetch_arp(uut):
+    '''Arp entries by address, empty when no arp
+
+    ShowIpArp nests them under interfaces/<intf>/ipv4/neighbors/<address>.
+    '''
+    try:
+        output = ShowIpArp(device=uut).parse()
+    except SchemaEmptyParserError:
+        # If only 1 arp, then it will return empty, which is perfectly fine
+        return {}
+    return {addr: entry
+            for intf in output.get('interfaces', {}).values()
+            for addr, entry in intf.get('ipv4', {}).get('neighbors', {}).items()}
+
 class TriggerClearArpVrfAllForceDelete(Trigger):
 
     @aetest.setup
@@ -28,15 +58,11 @@ class TriggerClearArpVrfAllForceDelete(Trigger):
         ''' '''
 
         # Perform init steps here
-        # Call our parser
-        parser = ShowIpArp(device=uut)
-        output = parser.parse()
-        self.initial_output = {}
-
-        for addr, value in output.items():
-            if 'age' in value:
-                self.initial_output[addr] = {}
-                self.initial_output[addr]['age'] = value['age']
+        # Call our parser, and keep the age of every arp by address
+        self.initial_snapshot = Snapshot.capture(fetch_arp(uut),
+                                                 fields=['age'])
+        if not self.initial_snapshot:
+            self.skipped('No arp to clear')
 
     @aetest.test
     def clear(self, uut):
@@ -45,25 +71,40 @@ class TriggerClearArpVrfAllForceDelete(Trigger):
         uut.execute('clear ip arp vrf all force-delete')
 
     @aetest.test
-    def verify_clear(self, uut, sleep):
-
-        time.sleep(sleep)
-        # Call our parser
-        parser = ShowIpArp(device=uut)
-        try:
-            after_output = parser.parse()
-        except SchemaEmptyParserError:
-            # If only 1 arp, then it will return empty, which is perfectly fine
-            pass
-
-        for addr, value in self.initial_output.items():
-             if addr not in after_output:
-                 # Lost an arp!
-                 self.failed('Lost {addr}'.format(addr=addr))
-
-
-             # Make sure uptime is less than 30 sec
-             if not after_output[addr]['Age'] == '-' and\
-                after_output[addr]['Age'] > 30 or\
-                after_output[addr]['Age'] > self.initial_output[addr]['Age']:
-                 self.failed('{addr} was not reseted'.format(addr=addr))
+    def verify_clear(self, uut, timeout=60, interval=1, max_interval=10):
+
+        def not_reset(after):
+            '''Initial arps missing or not reseted in the after snapshot'''
+            # Nothing came back yet
+            if not after:
+                return {'arp table': 'empty'}
+
+            # Lost arps!
+            pending = dict.fromkeys(self.initial_snapshot.diff(after).removed,
+                                    'Lost')
+            for addr in self.initial_snapshot:
+                if addr in pending:
+                    continue
+
+                # Make sure uptime is less than 30 sec, or below its
+                # initial one
+                age = age_seconds(after.get(addr, ['age'], '-'))
+                initial_age = age_seconds(
+                    self.initial_snapshot.get(addr, ['age'], '-'))
+                if age is not None and (age > 30 or initial_age is not None
+                                        and age > initial_age):
+                    pending[addr] = 'not reseted'
+            return pending
+
+        # Poll until every arp came back, instead of sleeping the worst case
+        result = poll_until(lambda: Snapshot.capture(fetch_arp(uut),
+                                                     fields=['age']),
+                            lambda output: not not_reset(output),
+                            timeout=timeout, interval=interval,
+                            max_interval=max_interval)
+        if not result.converged:
+            self.failed('\n'.join('{addr} {reason}'.format(addr=addr,
+                                                            reason=reason)
+                        for addr, reason in not_reset(result.value).items()))
+        log.info('Arp converged in {t:.1f}s ({n} polls)'.format(
+            t=result.elapsed, n=result.attempts))
@@ -5,7 +5,9 @@ import pprint
 import argparse
 
 from pyats.topology import loader
-from genie.libs.parser.iosxe.show_interface import ShowInterfaces
+
+from replay_device import ReplayDevice, time_parses
+from parser_index import index
 
 
 def load(testbed, device_name):
@@ -17,7 +19,8 @@ def load(testbed, device_name):
                        "testbed '{tb}'".format(d=device, tb=testbed))
 
 def parse(device):
-    return ShowInterfaces(device).parse()
+    # Only imports the module of the show interfaces parser, on first use
+    return index.parse(device, 'show interfaces')
 
 
 if __name__ == '__main__':
@@ -31,12 +34,38 @@ if __name__ == '__main__':
                         help='Name or alias of the device to parse on',
                         default = 'helper')
 
+    parser.add_argument('-replay',
+                        help='Unicon log to replay instead of connecting, '
+                             'e.g. demo_metaparser_iosxe_output')
+
+    parser.add_argument('-latency', type=float,
+                        help='Seconds added to each replayed command',
+                        default = 0)
+
+    parser.add_argument('-scale', type=int,
+                        help='Replay each output repeated this many times',
+                        default = 1)
+
+    parser.add_argument('-iterations', type=int,
+                        help='Time this many parses of each kind',
+                        default = 1)
+
     custom_args = parser.parse_known_args()[0]
     testbed_file = custom_args.testbed_file
     device_name = custom_args.device
 
-    device = load(testbed_file, device_name)
+    if custom_args.replay:
+        device = ReplayDevice.from_log(custom_args.replay, name=device_name,
+                                       os='iosxe',
+                                       latency=custom_args.latency,
+                                       scale=custom_args.scale)
+    else:
+        device = load(testbed_file, device_name)
     device.connect()
 
     parsed = parse(device)
     pprint.pprint(parsed)
+
+    if custom_args.iterations > 1:
+        print('parse: {:.2f} ms'.format(1e3 *
+            time_parses(lambda: parse(device), custom_args.iterations)))
@@ -5,7 +5,14 @@ import pprint
 import argparse
 
 from pyats.topology import loader
-from genie.libs.parser.nxos.show_bgp import ShowBgpProcessVrfAll
+
+from multi_context import (CachingDevice, open_sessions, context_commands,
+                           parse_contexts)
+from xml_fast import parse_bgp_process_vrf_all, complete
+from replay_device import ReplayDevice, time_parses
+from parser_index import index
+
+CLI_COMMAND = 'show bgp process vrf all'
 
 
 def load(testbed, device_name):
@@ -17,15 +24,27 @@ def load(testbed, device_name):
                        "testbed '{tb}'".format(d=device, tb=testbed))
 
 def parse_cli(device):
-    # By the default it will take cli
-    return ShowBgpProcessVrfAll(device).parse()
+    # By the default it will take cli. The parser module is only imported
+    # on first use, through the parser index
+    return index.parse(device, CLI_COMMAND)
 
 def parse_xml(device):
+    ShowBgpProcessVrfAll = index.parser_class(CLI_COMMAND, device.os)
     return ShowBgpProcessVrfAll(device, context=['xml']).parse()
 
 def parse_xml_cli(device):
-    # Parse Xml, and if any key is missing, complete it with cli output
-    return ShowBgpProcessVrfAll(device, context=['xml', 'cli']).parse()
+    # Parse Xml, and if any key is missing, complete it with cli output.
+    # Both outputs are fetched up front, concurrently with several sessions
+    return parse_contexts(index.parser_class(CLI_COMMAND, device.os), device,
+                          CLI_COMMAND,
+                          contexts=['xml', 'cli'])
+
+def parse_xml_fast(device, cli_parsed=None):
+    # Read the xml reply incrementally, straight into the schema dict, and
+    # complete the keys it lacks from the cli result when given
+    parsed = parse_bgp_process_vrf_all(
+        device.execute('{} | xml'.format(CLI_COMMAND)))
+    return complete(parsed, cli_parsed) if cli_parsed else parsed
 
 
 if __name__ == '__main__':
@@ -39,13 +58,47 @@ if __name__ == '__main__':
                         help='Name or alias of the device to parse on',
                         default = 'uut')
 
+    parser.add_argument('-sessions', type=int,
+                        help='Connections used to fetch the cli and xml '
+                             'outputs concurrently',
+                        default = 2)
+
+    parser.add_argument('-fast_xml', action='store_true',
+                        help='Also parse the xml output with xml_fast')
+
+    parser.add_argument('-replay',
+                        help='Unicon log to replay instead of connecting, '
+                             'e.g. demo_metaparser_nxos_output')
+
+    parser.add_argument('-latency', type=float,
+                        help='Seconds added to each replayed command',
+                        default = 0)
+
+    parser.add_argument('-scale', type=int,
+                        help='Replay each output repeated this many times',
+                        default = 1)
+
+    parser.add_argument('-iterations', type=int,
+                        help='Time this many parses of each kind',
+                        default = 1)
+
     custom_args = parser.parse_known_args()[0]
     testbed_file = custom_args.testbed_file
     device_name = custom_args.device
 
-    device = load(testbed_file, device_name)
+    if custom_args.replay:
+        device = ReplayDevice.from_log(custom_args.replay, name=device_name,
+                                       os='nxos',
+                                       latency=custom_args.latency,
+                                       scale=custom_args.scale)
+    else:
+        device = load(testbed_file, device_name)
     device.connect()
 
+    # The three parses below share the outputs, each command runs once
+    device = CachingDevice(device, open_sessions(device, custom_args.sessions))
+    device.prefetch(context_commands(CLI_COMMAND))
+
     cli_parsed = parse_cli(device)
     pprint.pprint(cli_parsed)
 
@@ -54,3 +107,13 @@ if __name__ == '__main__':
 
     xml_cli_parsed = parse_xml_cli(device)
     pprint.pprint(xml_cli_parsed)
+
+    if custom_args.fast_xml:
+        pprint.pprint(parse_xml_fast(device, cli_parsed))
+
+    print('{} commands executed for 3 parses'.format(device.executed))
+
+    if custom_args.iterations > 1:
+        for parse in (parse_cli, parse_xml, parse_xml_cli):
+            print('{}: {:.2f} ms'.format(parse.__name__, 1e3 *
+                time_parses(lambda: parse(device), custom_args.iterations)))
@@ -0,0 +1,104 @@
+#
+# imports
+#
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Command run for each metaparser context, from the cli command
+CONTEXT_COMMANDS = {
+    'cli': '{}',
+    'xml': '{} | xml',
+}
+
+
+def open_sessions(device, count=2):
+    '''[device] followed by count - 1 extra connections to it.
+
+    The extra sessions are pyATS connection aliases (session_1, ...), so
+    commands can run on all of them at the same time.
+    '''
+    sessions = [device]
+    for number in range(1, count):
+        alias = 'session_{}'.format(number)
+        if not hasattr(device, alias):
+            device.connect(alias=alias)
+        sessions.append(getattr(device, alias))
+    return sessions
+
+
+class CachingDevice(object):
+    '''Device proxy remembering the output of every executed command.
+
+    Metaparser parsers only call device.execute(), so parsing with several
+    parsers, or several contexts, of the same command on this proxy runs
+    each command once per run. prefetch() runs commands in parallel over
+    several sessions to the device (see open_sessions) and fills the cache
+    ahead of parsing. Everything but execute() is the wrapped device's.
+    '''
+
+    def __init__(self, device, sessions=None):
+        self.device = device
+        self.sessions = sessions or [device]
+        self.outputs = {}
+        self.executed = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.device, name)
+
+    def execute(self, command, *args, **kwargs):
+        try:
+            return self.outputs[command]
+        except KeyError:
+            pass
+        output = self.device.execute(command, *args, **kwargs)
+        with self._lock:
+            self.executed += 1
+            return self.outputs.setdefault(command, output)
+
+    def prefetch(self, commands):
+        '''Execute the commands not cached yet, spread over the sessions.'''
+        commands = [command for command in dict.fromkeys(commands)
+                    if command not in self.outputs]
+        if len(commands) < 2 or len(self.sessions) < 2:
+            for command in commands:
+                self.execute(command)
+            return
+
+        def run(session, assigned):
+            return [(command, session.execute(command)) for command in assigned]
+
+        count = min(len(self.sessions), len(commands))
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            futures = [pool.submit(run, self.sessions[number], commands[number::count])
+                       for number in range(count)]
+            for future in futures:
+                for command, output in future.result():
+                    with self._lock:
+                        self.executed += 1
+                        self.outputs.setdefault(command, output)
+
+    def invalidate(self, command=None):
+        '''Forget one command's output, or all of them.'''
+        with self._lock:
+            if command is None:
+                self.outputs.clear()
+            else:
+                self.outputs.pop(command, None)
+
+
+def context_commands(cli_command, contexts=('xml', 'cli')):
+    return [CONTEXT_COMMANDS[context].format(cli_command) for context in contexts]
+
+
+def parse_contexts(parser_class, device, cli_command, contexts=('xml', 'cli')):
+    '''parser_class(device, context=contexts).parse(), outputs fetched at once.
+
+    The outputs of every context are fetched together (concurrently when
+    device is a CachingDevice with several sessions) before parsing, so
+    completing the xml result with cli output costs no extra round-trip.
+    '''
+    if not isinstance(device, CachingDevice):
+        device = CachingDevice(device)
+    device.prefetch(context_commands(cli_command, contexts))
+    return parser_class(device, context=list(contexts)).parse()
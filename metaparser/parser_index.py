@@ -0,0 +1,200 @@
+#
+# imports
+#
+import os
+import re
+import json
+import pkgutil
+import argparse
+import importlib
+import threading
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'parser_index.json')
+INDEX_FORMAT_VERSION = 1
+
+# Fields of a command, e.g. "show interface {interface}"
+_FIELD = re.compile(r'\{([^{}]*)\}')
+
+
+def normalize(command):
+    return ' '.join(command.lower().split())
+
+
+def _template_pattern(command):
+    '''Regex matching the filled form of command, a group per field.
+
+    Each field becomes a named group, so its value can be given back to
+    the parser under the name of its cli() argument: "{pic-slot}" is
+    pic_slot. A field whose name is still not a valid group name, or
+    repeats an earlier one, only has to match.
+    '''
+    parts = []
+    names = set()
+    position = 0
+    for field in _FIELD.finditer(command):
+        parts.append(re.escape(command[position:field.start()]))
+        name = field.group(1).replace('-', '_')
+        if name.isidentifier() and name not in names:
+            names.add(name)
+            parts.append(r'(?P<{}>\S+)'.format(name))
+        else:
+            parts.append(r'\S+')
+        position = field.end()
+    parts.append(re.escape(command[position:]))
+    return re.compile(''.join(parts) + '$', re.I)
+
+
+class ParserIndex(object):
+    '''Command -> (os, module, class) index of genie parsers.
+
+    Importing genie.libs.parser, or walking it through Lookup, imports every
+    parser module of an os. The index file maps each command to the module
+    and class parsing it per os, so only the module of a command is
+    imported, on first use:
+
+        index = ParserIndex()
+        ShowBgpProcessVrfAll = index.parser_class('show bgp process vrf all', 'nxos')
+        index.parse(device, 'show bgp process vrf all')
+
+    Commands are matched case and whitespace insensitively, and commands
+    with fields such as "show interface {interface}" match their filled
+    form, parse() passing the field values to the parser. Build or refresh
+    the index file with:
+
+        python parser_index.py -build
+    '''
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self._commands = None
+        self._templates = None
+        self._classes = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._commands is None:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_FORMAT_VERSION:
+                raise ValueError("Unsupported parser index format in "
+                                 "'{}'".format(self.path))
+            commands = {normalize(command): oses
+                        for command, oses in data['commands'].items()}
+            # Field names keep their case, e.g. {moduleNum}. The templates
+            # with the fewest fields are tried first, so "show bgp vrf {vrf}
+            # all summary" wins over "show bgp vrf {vrf} {af} {prefix}"
+            templates = sorted((command.count('{'), command)
+                               for command in data['commands']
+                               if '{' in command)
+            self._templates = [(_template_pattern(command),
+                                data['commands'][command])
+                               for _, command in templates]
+            self._commands = commands
+        return self._commands
+
+    def _match(self, command, os_):
+        '''(module, class name, {field: value}) of command on os_.'''
+        commands = self._load()
+        oses = commands.get(normalize(command))
+        fields = {}
+        if oses is None:
+            # Values keep their case, only the template text is insensitive
+            filled = ' '.join(command.split())
+            for pattern, template_oses in self._templates:
+                match = os_ in template_oses and pattern.match(filled)
+                if match:
+                    oses, fields = template_oses, match.groupdict()
+                    break
+        if not oses or os_ not in oses:
+            raise KeyError("No parser for '{c}' on os '{o}'".format(
+                c=normalize(command), o=os_))
+        module, cls = oses[os_]
+        return module, cls, fields
+
+    def lookup(self, command, os_):
+        '''(module, class name) parsing command on os_, KeyError if none.'''
+        module, cls, _ = self._match(command, os_)
+        return module, cls
+
+    def _class(self, module, cls):
+        try:
+            return self._classes[module, cls]
+        except KeyError:
+            with self._lock:
+                parser = getattr(importlib.import_module(module), cls)
+                return self._classes.setdefault((module, cls), parser)
+
+    def parser_class(self, command, os_):
+        '''Parser class of command for os_, importing only its module.'''
+        return self._class(*self.lookup(command, os_))
+
+    def parse(self, device, command, **kwargs):
+        '''Like device.parse(command): run the parser of command for device.os.
+
+        The values of a filled command, e.g. X in "show ip route vrf X",
+        are given to the parser as keyword arguments; kwargs take precedence.
+        '''
+        module, cls, fields = self._match(command, device.os)
+        fields.update(kwargs)
+        return self._class(module, cls)(device=device).parse(**fields)
+
+    @property
+    def imported(self):
+        return sorted({module for module, _ in self._classes})
+
+
+def build_index(package='genie.libs.parser', path=INDEX_FILE):
+    '''Import every parser module once and write the index file.
+
+    Only MetaParser subclasses giving their commands in cli_command are
+    indexed, under each of them; schema classes declare none.
+    '''
+    from genie.metaparser import MetaParser
+
+    root = importlib.import_module(package)
+    commands = {}
+    for os_info in pkgutil.iter_modules(root.__path__):
+        if not os_info.ispkg:
+            continue
+        os_package = importlib.import_module('{}.{}'.format(package, os_info.name))
+        for module_info in pkgutil.iter_modules(os_package.__path__):
+            module_name = '{}.{}'.format(os_package.__name__, module_info.name)
+            try:
+                module = importlib.import_module(module_name)
+            except Exception:
+                continue
+            for name, cls in vars(module).items():
+                if not isinstance(cls, type) or cls.__module__ != module_name \
+                        or not issubclass(cls, MetaParser):
+                    continue
+                cli_command = getattr(cls, 'cli_command', None)
+                if not cli_command:
+                    continue
+                if isinstance(cli_command, str):
+                    cli_command = [cli_command]
+                for command in cli_command:
+                    commands.setdefault(' '.join(command.split()), {})[
+                        os_info.name] = [module_name, name]
+    with open(path, 'w') as f:
+        json.dump({'version': INDEX_FORMAT_VERSION, 'commands': commands}, f,
+                  indent=1, sort_keys=True)
+    return len(commands)
+
+
+# Shared by the demos
+index = ParserIndex()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genie parser index')
+    parser.add_argument('-build', action='store_true',
+                        help='Rebuild the index file from genie.libs.parser')
+    parser.add_argument('-command', help='Show the parser of this command')
+    parser.add_argument('-os', default='nxos')
+    custom_args = parser.parse_known_args()[0]
+
+    if custom_args.build:
+        print('{} commands indexed in {}'.format(build_index(), INDEX_FILE))
+    if custom_args.command:
+        print(index.lookup(custom_args.command, custom_args.os))
@@ -0,0 +1,171 @@
+#
+# imports
+#
+import re
+import ast
+import time
+
+_EXECUTE = re.compile(r'%UNICON-INFO: \+\+\+ execute\s+\+\+\+')
+# Device prompt, at the start of a line or right after an NX-OS XML reply
+_PROMPT = re.compile(r'^(.*\]\]>\]\]>)?[\w.-]+(?:\([\w-]+\))?#')
+# Outermost table of an NX-OS XML reply, e.g. <TABLE_vrf>...</TABLE_vrf>
+_XML_TABLE = re.compile(r'(<TABLE_(\w+)>)(.*)(</TABLE_\2>)', re.S)
+
+
+def _executes(lines):
+    '''Yield (command, output, prompt line number) for every execute.'''
+    number = 0
+    while number < len(lines):
+        if _EXECUTE.search(lines[number]) and number + 1 < len(lines):
+            command = lines[number + 1].strip()
+            output = []
+            number += 2
+            while number < len(lines):
+                prompt = _PROMPT.match(lines[number])
+                if prompt:
+                    if prompt.group(1):
+                        output.append(prompt.group(1))
+                    break
+                output.append(lines[number])
+                number += 1
+            yield command, '\n'.join(output) + '\n', number
+        number += 1
+
+
+def _read_lines(path):
+    with open(path) as log:
+        return log.read().splitlines()
+
+
+def read_unicon_log(path):
+    '''Return [(command, output)] for every execute in a unicon log.'''
+    return [(command, output)
+            for command, output, _ in _executes(_read_lines(path))]
+
+
+def read_results(path):
+    '''{command: parsed dict} of the results a demo pprinted in its log.
+
+    The demos pprint each result right after the prompt ending the output
+    of the last command they executed for it.
+    '''
+    lines = _read_lines(path)
+    results = {}
+    for command, _, number in _executes(lines):
+        if number >= len(lines):
+            continue
+        dump = lines[number][_PROMPT.match(lines[number]).end():].strip()
+        if not dump.startswith('{'):
+            continue
+        dump = [dump]
+        number += 1
+        while number < len(lines) and lines[number].strip():
+            dump.append(lines[number])
+            number += 1
+        results[command] = ast.literal_eval('\n'.join(dump))
+    return results
+
+
+def normalize(command):
+    '''Command compared case and whitespace insensitively.'''
+    return ' '.join(command.lower().split())
+
+
+def repeat_output(output, scale):
+    '''Default scaling: the output repeated scale times.
+
+    An XML reply must stay a single document, so the rows of its outermost
+    TABLE_* element are repeated instead; one without a table is left as is.
+    '''
+    if not output.lstrip().startswith('<'):
+        return output * scale
+    return _XML_TABLE.sub(lambda match: match.group(1) + match.group(3) * scale
+                          + match.group(4), output, count=1)
+
+
+class ReplayDevice(object):
+    '''Device serving recorded outputs instead of a real connection.
+
+    execute() returns the output recorded for the command, matched exactly
+    first and then case and whitespace insensitively; an unknown command
+    raises KeyError. Optionally each execute() waits latency seconds, like
+    a round-trip to the device, and outputs are scaled with
+    scaler(output, scale) to benchmark larger outputs.
+
+        device = ReplayDevice.from_log('demo_metaparser_nxos_output',
+                                       name='uut', os='nxos')
+        ShowBgpProcessVrfAll(device).parse()
+
+    connect(), disconnect() and configure() only record what was asked.
+    '''
+
+    def __init__(self, outputs, name='replay', os=None, latency=0, scale=1,
+                 scaler=repeat_output):
+        self.name = name
+        self.os = os
+        self.latency = latency
+        self.scale = scale
+        self.scaler = scaler
+        self.connected = False
+        self.executed = 0
+        self.configured = []
+        self._outputs = {}
+        self._normalized = {}
+        for command, output in dict(outputs).items():
+            self.record(command, output)
+
+    @classmethod
+    def from_log(cls, *paths, **kwargs):
+        '''Device replaying the executes of unicon logs, the last one wins.'''
+        outputs = {}
+        for path in paths:
+            outputs.update(read_unicon_log(path))
+        return cls(outputs, **kwargs)
+
+    def record(self, command, output):
+        if self.scale != 1:
+            output = self.scaler(output, self.scale)
+        self._outputs[command] = output
+        self._normalized[normalize(command)] = output
+
+    @property
+    def commands(self):
+        return list(self._outputs)
+
+    def connect(self, alias=None, *args, **kwargs):
+        # pyATS makes each connection alias an attribute of the device
+        if alias:
+            setattr(self, alias, self)
+        self.connected = True
+
+    def disconnect(self, *args, **kwargs):
+        self.connected = False
+
+    def is_connected(self, *args, **kwargs):
+        return self.connected
+
+    def configure(self, config, *args, **kwargs):
+        self.configured.append(config)
+        return ''
+
+    def execute(self, command, *args, **kwargs):
+        try:
+            output = self._outputs[command]
+        except KeyError:
+            try:
+                output = self._normalized[normalize(command)]
+            except KeyError:
+                raise KeyError("No recorded output for '{c}' on "
+                               "'{d}'".format(c=command, d=self.name))
+        if self.latency:
+            time.sleep(self.latency)
+        self.executed += 1
+        return output
+
+
+def time_parses(parse, iterations):
+    '''Average seconds of parse() over iterations calls.'''
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse()
+    return (time.perf_counter() - start) / iterations
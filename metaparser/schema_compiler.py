@@ -0,0 +1,387 @@
+#
+# imports
+#
+import copy
+import time
+import argparse
+import threading
+from itertools import islice
+
+
+class SchemaValidationError(ValueError):
+    '''A parsed result does not match the parser schema.'''
+
+    def __init__(self, path, message):
+        super().__init__('{}: {}'.format(
+            ''.join('[{!r}]'.format(key) for key in path) or 'result', message))
+        self.path = path
+
+
+#
+# Compilation
+#
+# Classes genie checks with isinstance; any other class, like a Use, is
+# called on the value and the result replaces it
+_CHECKED_TYPES = (int, float, str, bool, list, dict, tuple, set)
+
+_KINDS = frozenset(('Any', 'Optional', 'Required', 'Default', 'Fallback',
+                    'Or', 'And', 'Use', 'ListOf', 'Schema'))
+
+# Returned by a key matcher for a key it does not match
+_NO_MATCH = object()
+
+
+def _kind(node):
+    '''Name of a genie schemaengine node (Any, Optional, Or, ...), or None.'''
+    name = type(node).__name__
+    return name if name in _KINDS else None
+
+
+def _inner(node):
+    '''Wrapped schema of an Optional/Required/Use/ListOf/Schema node.'''
+    return getattr(node, 'schema', None)
+
+
+def _alternatives(node):
+    '''Schemas of an Or/And node.'''
+    return list(node.schemas)
+
+
+def _converter(convert):
+    def check_convert(data, path):
+        try:
+            return convert(data)
+        except Exception as e:
+            raise SchemaValidationError(path, '{!r} failed on {!r}: {}'.format(
+                convert, data, e))
+    return check_convert
+
+
+def _compile(schema, sample):
+    '''Return check(data, path) validating data against schema.
+
+    check returns the value genie's validation gives: data itself, or what
+    a Use, a callable or a class converted it to.
+    '''
+    kind = _kind(schema)
+
+    if isinstance(schema, dict):
+        return _compile_dict(schema, sample)
+
+    if kind == 'ListOf':
+        return _compile_list(_compile(_inner(schema), sample), sample)
+
+    if kind in ('Or', 'And'):
+        options = [_compile(option, sample) for option in _alternatives(schema)]
+        if kind == 'Or':
+            return lambda data, path: _first_match(options, data, path)
+
+        def check_all(data, path):
+            # Each schema gets what the previous one converted
+            for option in options:
+                data = option(data, path)
+            return data
+        return check_all
+
+    if kind in ('Schema', 'Optional', 'Required', 'Default', 'Fallback'):
+        return _compile(_inner(schema), sample)
+
+    if kind == 'Any':
+        return lambda data, path: data
+
+    if kind == 'Use':
+        return _converter(_inner(schema))
+
+    if schema in _CHECKED_TYPES:
+        def check_type(data, path):
+            if not isinstance(data, schema):
+                raise SchemaValidationError(path, 'expected {}, got {!r}'.format(
+                    schema.__name__, data))
+            return data
+        return check_type
+
+    if callable(schema):
+        return _converter(schema)
+
+    # Any other value, lists included, must be equal
+    def check_value(data, path):
+        if data != schema:
+            raise SchemaValidationError(path, 'expected {!r}, got {!r}'.format(
+                schema, data))
+        return data
+    return check_value
+
+
+def _first_match(options, data, path):
+    errors = []
+    for option in options:
+        try:
+            return option(data, path)
+        except SchemaValidationError as e:
+            errors.append(str(e))
+    raise SchemaValidationError(path, 'no alternative matched: {}'.format(
+        '; '.join(errors)))
+
+
+def _compile_list(check, sample):
+    '''ListOf: a list whose every entry matches the wrapped schema.'''
+    def check_list(data, path):
+        if not isinstance(data, list):
+            raise SchemaValidationError(path, 'expected a list, got {!r}'.format(data))
+        result = data
+        entries = enumerate(data) if sample is None else \
+            islice(enumerate(data), sample)
+        for index, value in entries:
+            converted = check(value, path + (index,))
+            if converted is not value:
+                if result is data:
+                    result = list(data)
+                result[index] = converted
+        return result
+    return check_list
+
+
+def _any_key(data_key):
+    return data_key
+
+
+def _key_matcher(key):
+    '''Return match(data key) for a wildcard key: the key, converted by a
+    callable key, or _NO_MATCH.'''
+    kind = _kind(key)
+    if kind == 'Or':
+        matchers = [_key_matcher(option) for option in _alternatives(key)]
+
+        def match_any(data_key):
+            for match in matchers:
+                matched = match(data_key)
+                if matched is not _NO_MATCH:
+                    return matched
+            return _NO_MATCH
+        return match_any
+    if key in _CHECKED_TYPES:
+        return lambda data_key: data_key if isinstance(data_key, key) else _NO_MATCH
+    if kind == 'Use' or callable(key):
+        convert = _inner(key) if kind == 'Use' else key
+
+        def match_converted(data_key):
+            try:
+                return convert(data_key)
+            except Exception:
+                return _NO_MATCH
+        return match_converted
+    return lambda data_key: data_key if data_key == key else _NO_MATCH
+
+
+def _compile_dict(schema, sample):
+    # Genie matches a data key with, in turn: a required literal key, a
+    # required wildcard (type, callable or Or key), the optional keys in
+    # schema order, then the first Any(). Optional literal keys a wildcard
+    # takes first are resolved here, once.
+    required = []
+    wildcards = []
+    ordered = []
+    any_keys = []
+    for key, value in schema.items():
+        check = _compile(value, sample)
+        kind = _kind(key)
+        if kind == 'Any':
+            any_keys.append(check)
+            continue
+        is_optional = kind in ('Optional', 'Default', 'Fallback')
+        if is_optional or kind == 'Required':
+            key = _inner(key)
+        if _kind(key) == 'Any':
+            match = _any_key
+        elif _kind(key) in ('Or', 'Use') or isinstance(key, type) or callable(key):
+            match = _key_matcher(key)
+        else:
+            match = None
+        if is_optional:
+            ordered.append((key, match, check))
+        elif match is not None:
+            wildcards.append((match, check))
+        else:
+            required.append((key, check))
+    required_wildcards = len(wildcards)
+
+    # Optional literal keys, and the few a wildcard takes: (key, check,
+    # key in the result, required wildcard taking it or None)
+    optional = []
+    taken = []
+    for key, match, check in ordered:
+        if match is not None:
+            wildcards.append((match, check))
+            continue
+        for index, (wildcard, wildcard_check) in enumerate(wildcards):
+            new_key = wildcard(key)
+            if new_key is not _NO_MATCH:
+                taken.append((key, wildcard_check, new_key,
+                              index if index < required_wildcards else None))
+                break
+        else:
+            optional.append((key, check))
+    wildcards.extend((_any_key, check) for check in any_keys[:1])
+    literal = frozenset(key for key, *_ in required + optional + taken)
+    closed = not optional and not taken and not required_wildcards
+
+    def check_dict(data, path):
+        if not isinstance(data, dict):
+            raise SchemaValidationError(path, 'expected a dict, got {!r}'.format(data))
+        converted = None
+        renamed = None
+        matched = set()
+        for key, check in required:
+            try:
+                value = data[key]
+            except KeyError:
+                raise SchemaValidationError(path, 'missing key {!r}'.format(key))
+            new = check(value, path + (key,))
+            if new is not value:
+                converted = converted or {}
+                converted[key] = new
+        for key, check in optional:
+            if key in data:
+                value = data[key]
+                new = check(value, path + (key,))
+                if new is not value:
+                    converted = converted or {}
+                    converted[key] = new
+        for key, check, new_key, index in taken:
+            if key in data:
+                value = data[key]
+                new = check(value, path + (key,))
+                if new is not value:
+                    converted = converted or {}
+                    converted[key] = new
+                if new_key is not key:
+                    renamed = renamed or {}
+                    renamed[key] = new_key
+                matched.add(index)
+        if not (closed and len(data) == len(required)):
+            others = [key for key in data if key not in literal]
+            if others and not wildcards:
+                raise SchemaValidationError(path, 'unexpected keys {}'.format(others))
+            checked = others if sample is None else others[:sample]
+            for key in checked:
+                for index, (match, check) in enumerate(wildcards):
+                    new_key = match(key)
+                    if new_key is not _NO_MATCH:
+                        break
+                else:
+                    raise SchemaValidationError(path, 'unexpected key {!r}'.format(key))
+                matched.add(index)
+                value = data[key]
+                new = check(value, path + (key,))
+                if new is not value:
+                    converted = converted or {}
+                    converted[key] = new
+                if new_key is not key:
+                    renamed = renamed or {}
+                    renamed[key] = new_key
+            for index in range(required_wildcards):
+                if index not in matched and not any(
+                        wildcards[index][0](key) is not _NO_MATCH
+                        for key in others[len(checked):]):
+                    raise SchemaValidationError(path, 'no key matching wildcard '
+                                                      '{}'.format(index))
+        if converted is None and renamed is None:
+            return data
+        converted = converted or {}
+        renamed = renamed or {}
+        return {renamed.get(key, key): converted.get(key, value)
+                for key, value in data.items()}
+    return check_dict
+
+
+def compile_schema(schema, sample=None):
+    '''Return validate(data) checking data against a metaparser schema.
+
+    The schema is analysed once: each dict level becomes a function that
+    knows its required, optional and wildcard keys, each leaf a type, value
+    or conversion check, following genie's schemaengine: ListOf validates
+    the entries of a list while a plain list is a value compared as is, and
+    Use, callables and classes other than the builtin types convert the
+    value. With sample, only the first sample entries of each list and of
+    the wildcard part of each dict are validated, e.g. for production runs
+    on very large outputs. validate() raises SchemaValidationError naming
+    the path of the first mismatch, and returns the data with the
+    conversions applied, as parser.parse() does; data without conversions
+    is returned as is. A ListDict is validated as the dict it stands for.
+    '''
+    check = _compile(schema, sample)
+
+    def validate(data):
+        if type(data).__name__ == 'ListDict':
+            data = data.reconstruct()
+        if not data:
+            raise SchemaValidationError((), 'empty result')
+        return check(data, ())
+    return validate
+
+_validators = {}
+_lock = threading.Lock()
+
+
+def validator_for(parser_class, sample=None):
+    '''Compiled validator of a parser class's schema, compiled once.'''
+    key = (parser_class, sample)
+    try:
+        return _validators[key]
+    except KeyError:
+        validate = compile_schema(parser_class.schema, sample)
+        with _lock:
+            return _validators.setdefault(key, validate)
+
+
+def parse(parser, context='cli', sample=None):
+    '''Run one context method of a parser and validate with the compiled schema.
+
+    Same result as parser.parse(context=[context]) for a single context,
+    without the generic validation walk.
+    '''
+    return validator_for(type(parser), sample)(getattr(parser, context)())
+
+
+#
+# Benchmark on the results recorded with the metaparser demos
+#
+def scaled_bgp(result, vrfs):
+    '''A show bgp process vrf all result with vrfs copies of its vrfs.'''
+    scaled = copy.deepcopy(result)
+    template = list(result['vrf'].values())[0]
+    for number in range(vrfs):
+        scaled['vrf']['vrf{}'.format(number)] = copy.deepcopy(template)
+    return scaled
+
+
+if __name__ == '__main__':
+    from genie.metaparser.util.schemaengine import Schema
+    from parser_index import index
+    from replay_device import read_results
+
+    parser = argparse.ArgumentParser(description='Compiled schema validation '
+                                                 'benchmark')
+    parser.add_argument('-vrfs', type=int, default=5000)
+    parser.add_argument('-sample', type=int, default=None)
+    parser.add_argument('-repeat', type=int, default=5)
+    custom_args = parser.parse_known_args()[0]
+
+    command = 'show bgp process vrf all'
+    result = read_results('demo_metaparser_nxos_output')[command]
+    result = scaled_bgp(result, custom_args.vrfs)
+    parser_class = index.parser_class(command, 'nxos')
+
+    def best(func):
+        times = []
+        for _ in range(custom_args.repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    generic = best(lambda: Schema(parser_class.schema).validate(result))
+    validate = validator_for(parser_class, custom_args.sample)
+    compiled = best(lambda: validate(result))
+    print('{} VRFs: generic validation {:.1f} ms, compiled {:.1f} ms'.format(
+        custom_args.vrfs, generic * 1e3, compiled * 1e3))
@@ -0,0 +1,292 @@
+#
+# imports
+#
+import re
+import time
+import argparse
+import tracemalloc
+
+try:
+    from lxml import etree
+    LXML = True
+except ImportError:
+    import xml.etree.ElementTree as etree
+    LXML = False
+
+_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+# End of an NX-OS XML reply
+_TRAILER = ']]>]]>'
+
+
+#
+# Incremental XML reading
+#
+def _local(tag):
+    return tag.rpartition('}')[2]
+
+
+def xml_chunks(output, size=65536):
+    '''Chunks of an XML reply without its declaration and trailer.
+
+    The declaration is dropped so the text is parsed as is, whatever
+    encoding it announces.
+    '''
+    end = output.find(_TRAILER)
+    if end != -1:
+        output = output[:end]
+    match = _DECLARATION.match(output)
+    start = match.end() if match else 0
+    for position in range(start, len(output), size):
+        yield output[position:position + size]
+
+
+def iter_rows(chunks, row_tags):
+    '''Yield (tag, fields) for every ROW_* element as it ends.
+
+    Elements are read incrementally from chunks and each row is cleared
+    once read, so memory is bounded by the largest row rather than by the
+    document. fields maps the local tag of each leaf of the row to its
+    text. Nested rows end, and are yielded, before their parent row. Last
+    comes (None, fields) with the leaves outside any row.
+    '''
+    parser = etree.XMLPullParser(events=('end',))
+    local = {}
+    root = None
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            root = element
+            try:
+                tag = local[element.tag]
+            except KeyError:
+                tag = local[element.tag] = _local(element.tag)
+            if tag not in row_tags:
+                continue
+            yield tag, {local.get(child.tag) or _local(child.tag):
+                            (child.text or '').strip()
+                        for child in element if len(child) == 0}
+            element.clear()
+            if LXML:
+                # lxml keeps the cleared rows around until deleted
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+    parser.close()
+    if root is not None:
+        yield None, {_local(element.tag): (element.text or '').strip()
+                     for element in root.iter()
+                     if len(element) == 0 and _local(element.tag) not in row_tags}
+
+
+#
+# show bgp process vrf all | xml
+#
+def _int(value):
+    return int(value)
+
+
+def _lower(value):
+    return value.lower()
+
+
+def _yes_no(value):
+    return 'No' if value == 'false' else 'Yes'
+
+
+# xml leaf: (schema key, conversion)
+PROCESS_FIELDS = {
+    'processid': ('bgp_pid', _int),
+    'protocolstartedreason': ('bgp_protocol_started_reason', None),
+    'protocoltag': ('bgp_tag', None),
+    'protocolstate': ('bgp_protocol_state', _lower),
+    'isolatemode': ('bgp_isolate_mode', None),
+    'mmode': ('bgp_mmode', None),
+    'memorystate': ('bgp_memory_state', _lower),
+    'forwardingstatesaved': ('bgp_performance_mode', _yes_no),
+    'asformat': ('bgp_asformat', None),
+    'attributeentries': ('num_attr_entries', _int),
+    'hwmattributeentries': ('hwm_attr_entries', _int),
+    'bytesused': ('bytes_used', _int),
+    'entriespendingdelete': ('entries_pending_delete', _int),
+    'hwmentriespendingdelete': ('hwm_entries_pending_delete', _int),
+    'pathsperattribute': ('bgp_paths_per_hwm_attr', _int),
+    'aspathentries': ('bgp_as_path_entries', _int),
+    'aspathbytes': ('bytes_used_as_path_entries', _int),
+}
+
+VRF_FIELDS = {
+    'vrf-id': ('vrf_id', None),
+    'vrf-state': ('vrf_state', _lower),
+    'vrf-router-id': ('router_id', None),
+    'vrf-cfgd-id': ('conf_router_id', None),
+    'vrf-confed-id': ('confed_id', _int),
+    'vrf-cluster-id': ('cluster_id', None),
+    'vrf-peers': ('num_conf_peers', _int),
+    'vrf-pending-peers': ('num_pending_conf_peers', _int),
+    'vrf-est-peers': ('num_established_peers', _int),
+    'vrf-rd': ('vrf_rd', None),
+}
+
+AF_PEER_FIELDS = {
+    'af-num-active-peers': 'active_peers',
+    'af-peer-routes': 'routes',
+    'af-peer-paths': 'paths',
+    'af-peer-networks': 'networks',
+    'af-peer-aggregates': 'aggregates',
+}
+
+
+def _mapped(fields, mapping):
+    result = {}
+    for tag, (key, convert) in mapping.items():
+        if tag in fields:
+            value = fields[tag]
+            result[key] = convert(value) if convert else value
+    return result
+
+
+def _vrf(fields):
+    vrf = _mapped(fields, VRF_FIELDS)
+    # Like the genie parser, a vrf without a vrf-rd has none configured
+    if 'vrf-est-peers' in fields:
+        vrf.setdefault('vrf_rd', 'not configured')
+    return vrf
+
+
+def _address_family(fields):
+    af = {}
+    if 'af-table-id' in fields:
+        af['table_id'] = '0x' + fields['af-table-id']
+    if 'af-state' in fields:
+        af['table_state'] = fields['af-state'].lower()
+    if 'af-num-peers' in fields:
+        af['peers'] = {int(fields['af-num-peers']): {
+            key: int(fields[tag]) for tag, key in AF_PEER_FIELDS.items()
+            if tag in fields}}
+    delay = {key: int(fields[tag]) for tag, key in (
+        ('nexthop-trigger-delay-critical', 'critical'),
+        ('nexthop-trigger-delay-non-critical', 'non_critical')) if tag in fields}
+    if delay:
+        af['next_hop_trigger_delay'] = delay
+    return af
+
+
+def parse_bgp_process_vrf_all(chunks):
+    '''ShowBgpProcessVrfAll schema dict from 'show bgp process vrf all | xml'.
+
+    chunks is the output as a string or an iterable of chunks (e.g. read
+    from the device as it comes). The result is the one of the genie
+    parser's xml(); keys a device leaves out of the XML reply can be
+    completed from the cli result with complete().
+    '''
+    if isinstance(chunks, str):
+        chunks = xml_chunks(chunks)
+    result = {}
+    afs = []
+    for tag, fields in iter_rows(chunks, ('ROW_vrf', 'ROW_af')):
+        if tag == 'ROW_af':
+            afs.append(fields)
+        elif tag == 'ROW_vrf':
+            vrf = _vrf(fields)
+            if afs:
+                vrf['address_family'] = {
+                    af['af-name'].lower(): _address_family(af) for af in afs}
+            afs = []
+            result.setdefault('vrf', {})[fields['vrf-name-out']] = vrf
+        else:
+            result.update(_mapped(fields, PROCESS_FIELDS))
+    return result
+
+
+def complete(result, other):
+    '''Add to result the keys of other it lacks, at every level.'''
+    for key, value in other.items():
+        if key not in result:
+            result[key] = value
+        elif isinstance(value, dict) and isinstance(result[key], dict):
+            complete(result[key], value)
+    return result
+
+
+#
+# Benchmark against a full DOM
+#
+def parse_dom(output):
+    '''Same result through a full ElementTree, for comparison.'''
+    import xml.etree.ElementTree as ElementTree
+    root = ElementTree.fromstring(''.join(xml_chunks(output)))
+    result = {}
+
+    def leaves(element):
+        return {_local(child.tag): (child.text or '').strip()
+                for child in element if len(child) == 0}
+
+    for element in root.iter():
+        tag = _local(element.tag)
+        if tag == '__readonly__':
+            result.update(_mapped(leaves(element), PROCESS_FIELDS))
+        elif tag == 'ROW_vrf':
+            fields = leaves(element)
+            vrf = _vrf(fields)
+            afs = [leaves(af) for af in element.iter() if _local(af.tag) == 'ROW_af']
+            if afs:
+                vrf['address_family'] = {
+                    af['af-name'].lower(): _address_family(af) for af in afs}
+            result.setdefault('vrf', {})[fields['vrf-name-out']] = vrf
+    return result
+
+
+VRF_XML = '''<ROW_vrf><vrf-name-out>vrf{0}</vrf-name-out><vrf-id>{1}</vrf-id>
+<vrf-state>UP</vrf-state><vrf-router-id>10.0.{2}.{3}</vrf-router-id>
+<vrf-cfgd-id>10.0.{2}.{3}</vrf-cfgd-id><vrf-confed-id>0</vrf-confed-id>
+<vrf-cluster-id>0.0.0.0</vrf-cluster-id><vrf-peers>4</vrf-peers>
+<vrf-pending-peers>0</vrf-pending-peers><vrf-est-peers>4</vrf-est-peers>
+<TABLE_af>{4}</TABLE_af></ROW_vrf>
+'''
+AF_XML = '''<ROW_af><af-id>{0}</af-id><af-name>{1}</af-name><af-table-id>{2:x}</af-table-id>
+<af-state>UP</af-state><af-num-peers>4</af-num-peers><af-num-active-peers>4</af-num-active-peers>
+<af-peer-routes>100</af-peer-routes><af-peer-paths>100</af-peer-paths>
+<af-peer-networks>10</af-peer-networks><af-peer-aggregates>0</af-peer-aggregates>
+<nexthop-trigger-delay-critical>3000</nexthop-trigger-delay-critical>
+<nexthop-trigger-delay-non-critical>10000</nexthop-trigger-delay-non-critical></ROW_af>
+'''
+
+
+def synthetic_reply(vrfs):
+    rows = ''.join(VRF_XML.format(
+        n, n + 1, n >> 8, n & 255,
+        AF_XML.format(0, 'IPv4 Unicast', n) + AF_XML.format(2, 'IPv6 Unicast', n | 0x80000000))
+        for n in range(vrfs))
+    return ('<?xml version="1.0" encoding="ISO-8859-1"?>\n'
+            '<nf:rpc-reply xmlns="http://www.cisco.com/nxos:1.0:bgp" '
+            'xmlns:nf="urn:ietf:params:xml:ns:netconf:base:1.0"><nf:data><show>'
+            '<bgp><process><__readonly__><processid>28708</processid>'
+            '<protocolstate>Running</protocolstate><asformat>asplain</asformat>'
+            '<TABLE_vrf>' + rows + '</TABLE_vrf></__readonly__></process></bgp>'
+            '</show></nf:data></nf:rpc-reply>\n]]>]]>')
+
+
+def _measure(parse, output):
+    start = time.perf_counter()
+    result = parse(output)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    parse(output)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incremental XML parsing '
+                                                 'example')
+    parser.add_argument('-vrfs', type=int, default=20000)
+    custom_args = parser.parse_known_args()[0]
+
+    output = synthetic_reply(custom_args.vrfs)
+    fast, fast_time, fast_peak = _measure(parse_bgp_process_vrf_all, output)
+    dom, dom_time, dom_peak = _measure(parse_dom, output)
+    assert fast == dom
+    print('{} VRFs, {:.1f} MB of XML ({})'.format(
+        custom_args.vrfs, len(output) / 1e6, 'lxml' if LXML else 'ElementTree'))
+    print('iterparse: {:.0f} ms, peak {:.1f} MB'.format(fast_time * 1e3, fast_peak / 1e6))
+    print('full DOM:  {:.0f} ms, peak {:.1f} MB'.format(dom_time * 1e3, dom_peak / 1e6))
@@ -0,0 +1,304 @@
+#
+# imports
+#
+import re
+import time
+import argparse
+import tracemalloc
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Blank and ---- separator lines between the header and the first row
+_LEADING = re.compile(r'(?:[-=+ \t]*(?:\n|$))*')
+# First blank or separator line after the rows, which ends the table
+_TABLE_END = r'^[-=+ \t]*$'
+
+
+class BulkTable(object):
+    '''Column oriented, oper_fill_tabular-like parse of one fixed width table.
+
+    The header line(s) are located once, the column spans are computed once
+    for the whole table and then every column is sliced out of all rows in
+    bulk:
+
+        numpy   rows padded to a common width viewed as one fixed width
+                array, one structured field per column (if numpy is
+                installed and the output is ASCII)
+        python  one slicing list comprehension per column
+
+    Values are only stripped, decoded and converted through field_mapping
+    when a column is first accessed, a whole column at a time. entries has
+    the same shape as oper_fill_tabular().entries but its rows are
+    read-only mappings onto the columns, not one dict per row.
+    '''
+
+    def __init__(self, device_output, header_fields, label_fields=None,
+                 index=(0,), field_mapping=None, table_terminal_pattern=None,
+                 backend='auto'):
+        if header_fields and isinstance(header_fields[0], str):
+            header_fields = [header_fields]
+        self.labels = list(label_fields or header_fields[0])
+        self.index = list(index)
+        self.field_mapping = field_mapping or {}
+
+        header_line, first_row = self._find_header(device_output, header_fields)
+        rows = self._find_rows(device_output, first_row, table_terminal_pattern)
+
+        # All rows padded to one width, in a single buffer
+        self.width = max([len(header_line)] + [len(row) for row in rows])
+        buffer = ''.join(row.ljust(self.width) for row in rows)
+        ascii_buffer = buffer.encode('ascii', 'replace')
+        self.spans = column_spans(header_line, header_fields[0], ascii_buffer,
+                                  self.width)
+
+        if backend == 'auto':
+            backend = 'numpy' if np is not None else 'python'
+        if backend == 'numpy' and not (rows and buffer.isascii()):
+            backend = 'python'
+        self.backend = backend
+        self.row_count = len(rows)
+        if backend == 'numpy':
+            self._raw = self._slice_numpy(ascii_buffer)
+        else:
+            # Sliced on first access of each column
+            self._rows = rows
+        self._columns = {}
+        self._entries = None
+
+    #
+    # Locating the table
+    #
+    @staticmethod
+    def _find_header(output, header_fields):
+        '''Return the first header line and the offset just after the header.'''
+        header = re.compile(r'\n'.join(
+            r'^[^\n]*{}[^\n]*$'.format(r'\s+'.join(field for field in fields if field))
+            for fields in header_fields), re.MULTILINE)
+        match = header.search(output)
+        if not match:
+            raise ValueError('Header {} not found in the output'.format(header_fields[0]))
+        return match.group().split('\n', 1)[0], match.end() + 1
+
+    @staticmethod
+    def _find_rows(output, start, table_terminal_pattern):
+        start = _LEADING.match(output, start).end()
+        end = _TABLE_END
+        if table_terminal_pattern:
+            end += '|' + table_terminal_pattern
+        match = re.compile(end, re.MULTILINE).search(output, start)
+        return output[start:match.start() if match else len(output)].splitlines()
+
+    #
+    # Backends
+    #
+    def _fixed_spans(self):
+        return [(start, self.width if end is None else end)
+                for start, end in self.spans]
+
+    def _slice_numpy(self, buffer):
+        spans = self._fixed_spans()
+        table = np.frombuffer(buffer, dtype=np.dtype({
+            'names': ['c{}'.format(i) for i in range(len(spans))],
+            'formats': ['S{}'.format(end - start) for start, end in spans],
+            'offsets': [start for start, _ in spans],
+            'itemsize': self.width}))
+        return [table['c{}'.format(i)] for i in range(len(spans))]
+
+    #
+    # Lazy access
+    #
+    def column(self, label):
+        '''All values of a column, stripped and converted on first access.'''
+        try:
+            return self._columns[label]
+        except KeyError:
+            pass
+        position = self.labels.index(label)
+        if not self.row_count:
+            values = []
+        elif self.backend == 'python':
+            start, end = self.spans[position]
+            values = [row[start:end].strip() for row in self._rows]
+        else:
+            # Decode the whole column at once
+            joined = b'\n'.join(self._raw[position].tolist())
+            values = list(map(str.strip, joined.decode('ascii').split('\n')))
+        convert = self.field_mapping.get(label)
+        if convert is not None:
+            values = list(map(convert, values))
+        self._columns[label] = values
+        return values
+
+    @property
+    def entries(self):
+        '''{index value: row} (nested for several index columns).'''
+        if self._entries is None:
+            keys = [self.column(self.labels[position]) for position in self.index]
+            self._entries = entries = {}
+            for row in range(self.row_count):
+                level = entries
+                for key in keys[:-1]:
+                    level = level.setdefault(key[row], {})
+                level[keys[-1][row]] = TableRow(self, row)
+        return self._entries
+
+
+class TableRow(Mapping):
+    '''Read-only {label: value} view of one row of a BulkTable.'''
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, label):
+        if label not in self._table.labels:
+            raise KeyError(label)
+        return self._table.column(label)[self._row]
+
+    def __iter__(self):
+        return iter(self._table.labels)
+
+    def __len__(self):
+        return len(self._table.labels)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def column_spans(header_line, header_fields, buffer, width):
+    '''Compute the (start, end) slice of every column once for a table.
+
+    Values are not always left aligned on their header (right aligned
+    counters, long values spilling under the next header), so the spans
+    come from the data itself:
+    runs of character positions that are non blank in at least one row
+    are attached to the closest header, and a column starts at its first
+    run. The last column extends to the end of the line (end None).
+
+    buffer holds the rows, padded to width, as bytes.
+    '''
+    headers = []
+    position = 0
+    for field in header_fields:
+        match = re.compile(field).search(header_line, position)
+        headers.append((match.start(), match.end()))
+        position = match.end()
+
+    # mask[i] is 1 when some row has a non blank at column i, read a whole
+    # column of the buffer at a time with a strided slice
+    mask = bytes(1 if buffer[position::width].strip(b' ') else 0
+                 for position in range(width))
+
+    starts = [start for start, _ in headers]
+    column = 0
+    for run in re.finditer(rb'[^\0]+', mask):
+        run_start, run_end = run.span()
+        # Closest header, never going back to an earlier column
+        distances = [max(start - run_end, run_start - end, 0)
+                     for start, end in headers]
+        closest = min(range(column, len(headers)), key=distances.__getitem__)
+        if run_start < starts[closest]:
+            starts[closest] = run_start
+        column = closest
+    for position in range(len(starts) - 1, 0, -1):
+        starts[position - 1] = min(starts[position - 1], starts[position])
+    return [(start, end) for start, end in zip(starts, starts[1:] + [None])]
+
+
+def parse_per_row(device_output, header_fields, label_fields, index=(0,),
+                  field_mapping=None):
+    '''Reference: one dict per row, each cell sliced and converted in turn.
+
+    Uses the same header, rows and spans as BulkTable, so only the per row
+    slicing is compared.
+    '''
+    if isinstance(header_fields[0], str):
+        header_fields = [header_fields]
+    field_mapping = field_mapping or {}
+    header_line, first_row = BulkTable._find_header(device_output, header_fields)
+    rows = BulkTable._find_rows(device_output, first_row, None)
+    width = max([len(header_line)] + [len(row) for row in rows])
+    spans = column_spans(header_line, header_fields[0], ''.join(
+        row.ljust(width) for row in rows).encode('ascii', 'replace'), width)
+
+    entries = {}
+    for line in rows:
+        row = {}
+        for label, (start, end) in zip(label_fields, spans):
+            value = line[start:end].strip()
+            convert = field_mapping.get(label)
+            row[label] = convert(value) if convert else value
+        entries[row[label_fields[index[0]]]] = row
+    return entries
+
+
+#
+# Benchmark on a synthetic NX-OS 'show interface brief'
+#
+BENCHMARK_HEADER = '''\
+--------------------------------------------------------------------------------
+Ethernet      VLAN    Type Mode   Status  Reason                   Speed     Port
+Interface                                                                    Ch #
+--------------------------------------------------------------------------------
+'''
+BENCHMARK_ROWS = (
+    '{name:<13} --      eth  routed up      none                       1000(D) --\n',
+    '{name:<13} 1       eth  access down    Link not connected         auto(D) --\n',
+)
+BENCHMARK_HEADER_FIELDS = [
+    ['Ethernet', 'VLAN', 'Type', 'Mode', 'Status', 'Reason', 'Speed', 'Port'],
+    ['Interface', '', '', '', '', '', '', r'Ch \#']]
+BENCHMARK_LABELS = ['Ethernet Interface', 'VLAN', 'Type', 'Mode', 'Status',
+                    'Reason', 'Speed', 'Port']
+
+
+def benchmark(rows=50000, repeat=3):
+    output = BENCHMARK_HEADER + ''.join(
+        BENCHMARK_ROWS[n % 2].format(name='Eth{}/{}'.format(n // 64 + 1, n % 64 + 1))
+        for n in range(rows))
+
+    def bulk(backend):
+        def run():
+            table = BulkTable(output, BENCHMARK_HEADER_FIELDS, BENCHMARK_LABELS,
+                              backend=backend)
+            # Touch every column, as pprint(result.entries) would
+            for label in BENCHMARK_LABELS:
+                table.column(label)
+            return table
+        return run
+
+    reference = parse_per_row(output, BENCHMARK_HEADER_FIELDS, BENCHMARK_LABELS)
+    candidates = [('per row', lambda: parse_per_row(
+        output, BENCHMARK_HEADER_FIELDS, BENCHMARK_LABELS))]
+    for backend in ('python',) + (('numpy',) if np is not None else ()):
+        table = bulk(backend)()
+        assert {key: dict(row) for key, row in table.entries.items()} == reference
+        candidates.append((backend, bulk(backend)))
+
+    for name, func in candidates:
+        best = min(_timed(func) for _ in range(repeat))
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('{:<8} {} rows: {:7.1f} ms, peak {:6.1f} MB'.format(
+            name, rows, best * 1000, peak / 1e6))
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk tabular parsing benchmark')
+    parser.add_argument('-rows', type=int, default=50000)
+    custom_args = parser.parse_known_args()[0]
+    benchmark(custom_args.rows)
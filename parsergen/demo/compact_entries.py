@@ -0,0 +1,201 @@
+#
+# imports
+#
+import sys
+import argparse
+import tracemalloc
+from collections.abc import Mapping
+
+
+class Schema(object):
+    '''Interned, shared tuple of the labels of a table row.
+
+    Every table with the same labels shares one Schema, so the label
+    strings and the label -> position lookup exist once, not once per row.
+    '''
+
+    __slots__ = ('labels', 'positions')
+    _interned = {}
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.positions = {label: position for position, label in enumerate(labels)}
+
+    @classmethod
+    def of(cls, labels):
+        labels = tuple(sys.intern(label) if isinstance(label, str) else label
+                       for label in labels)
+        try:
+            return cls._interned[labels]
+        except KeyError:
+            return cls._interned.setdefault(labels, cls(labels))
+
+    def row(self, entry):
+        '''Values of an entry dict as a tuple in schema order.'''
+        return tuple(entry[label] for label in self.labels)
+
+
+class CompactRow(Mapping):
+    '''Read-only {label: value} view of a row stored as a plain tuple.'''
+
+    __slots__ = ('_schema', '_values')
+
+    def __init__(self, schema, values):
+        self._schema = schema
+        self._values = values
+
+    def __getitem__(self, label):
+        return self._values[self._schema.positions[label]]
+
+    def __iter__(self):
+        return iter(self._schema.labels)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CompactTable(Mapping):
+    '''Read-only {key: row} mapping of one table, rows kept as tuples.
+
+    Rows are only wrapped in a CompactRow view when they are accessed.
+    '''
+
+    __slots__ = ('_schema', '_rows')
+
+    def __init__(self, schema, rows):
+        self._schema = schema
+        self._rows = rows
+
+    @classmethod
+    def from_entries(cls, entries):
+        '''Build from {key: {label: value}}, all rows having the same labels.'''
+        schema = None
+        rows = {}
+        for key, entry in entries.items():
+            if schema is None:
+                schema = Schema.of(entry)
+            elif entry.keys() != schema.positions.keys():
+                raise ValueError('Row {!r} does not have the labels {}'.format(
+                    key, schema.labels))
+            rows[key] = schema.row(entry)
+        return cls(schema or Schema.of(()), rows)
+
+    @property
+    def schema(self):
+        return self._schema
+
+    def __getitem__(self, key):
+        return CompactRow(self._schema, self._rows[key])
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def column(self, label):
+        '''All values of one column, in row order.'''
+        position = self._schema.positions[label]
+        return [values[position] for values in self._rows.values()]
+
+    def __repr__(self):
+        return repr({key: dict(row) for key, row in self.items()})
+
+
+class CompactEntries(Mapping):
+    '''Read-only nested mapping ending in CompactTable levels.
+
+    Keeps the oper_fill_tabular access, entries[title][key][label], while
+    the rows underneath are tuples sharing one schema per table.
+    '''
+
+    __slots__ = ('_levels',)
+
+    def __init__(self, levels):
+        self._levels = levels
+
+    def __getitem__(self, key):
+        return self._levels[key]
+
+    def __iter__(self):
+        return iter(self._levels)
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _is_table(entries):
+    '''A table maps keys to rows, rows being dicts of non dict values.'''
+    return all(isinstance(entry, Mapping) and
+               not any(isinstance(value, Mapping) for value in entry.values())
+               for entry in entries.values())
+
+
+def compact(entries):
+    '''Compact copy of oper_fill_tabular entries (or any nest of tables).
+
+        result = parsergen.oper_fill_tabular(...)
+        entries = compact(result.entries)
+        entries[2]['iox.01-00']['LSP Holdtime']
+    '''
+    if _is_table(entries):
+        return CompactTable.from_entries(entries)
+    return CompactEntries({key: compact(value) if isinstance(value, Mapping)
+                           else value for key, value in entries.items()})
+
+
+def wrap_rows(levels, schema, depth):
+    '''Wrap nested dicts holding row tuples depth levels down.
+
+    For parsers that build rows as schema.row() tuples directly, e.g.
+    StreamingTabular.collect(compact=True).
+    '''
+    if depth == 1:
+        return CompactTable(schema, levels)
+    return CompactEntries({key: wrap_rows(value, schema, depth - 1)
+                           for key, value in levels.items()})
+
+
+#
+# Example on a large 'show isis database' like result
+#
+def synthetic_entries(rows):
+    '''oper_fill_tabular-like entries of a large 'show isis database'.
+
+    Every row dict shares the same label strings, so the dict figure below
+    only counts the per-row overhead.
+    '''
+    labels = ["LSPID", "LSP Seq Num", "LSP Checksum", "LSP Holdtime", "ATT/P/OL"]
+    entries = {}
+    for level in (1, 2):
+        table = entries[level] = {}
+        for n in range(rows):
+            lsp_id = 'r{}.00-00'.format(n)
+            values = [lsp_id, '0x{:08x}'.format(n), '0x{:04x}'.format(n & 0xffff),
+                      str(n % 1200), '0/0/0']
+            table[lsp_id] = dict(zip(labels, values))
+    return entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compact tabular entries example')
+    parser.add_argument('-rows', type=int, default=100000)
+    custom_args = parser.parse_known_args()[0]
+
+    tracemalloc.start()
+    entries = synthetic_entries(custom_args.rows)
+    as_dicts = tracemalloc.get_traced_memory()[0]
+    compacted = compact(entries)
+    del entries
+    as_compact = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert compacted[2]['r7.00-00']['LSP Holdtime'] == '7'
+    print('{} rows: dict entries {:.1f} MB, compact entries {:.1f} MB'.format(
+        2 * custom_args.rows, as_dicts / 1e6, as_compact / 1e6))
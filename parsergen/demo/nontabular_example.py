@@ -7,7 +7,14 @@ import argparse
 from pyats.topology import loader
 
 from genie import parsergen
+from genie.parsergen.examples.parsergen.pyAts import registries
 import nontabular_markup
+from single_pass import SinglePassExtractor
+from parse_cache import ParseCache
+
+# Parsed results by (device, command, arguments), instead of letting
+# parsergen.ext_dictio accumulate every result
+PARSE_CACHE = ParseCache(maxsize=256, ttl=60)
 
 
 def load(testbed, device_name):
@@ -18,22 +25,52 @@ def load(testbed, device_name):
         raise KeyError("Could not find '{d}' within "
                        "testbed '{tb}'".format(d=device, tb=testbed))
 
-def parse_cli(device):
-    output = device.execute('show interface brief')
+def parse_cli(device, cache=PARSE_CACHE):
+    command = ('show_interface_<WORD>', [], {'ifname':'mgmt0'})
 
     attrValPairsToParse = [
         ('show.intf.if_name', 'mgmt0'),
     ]
 
-    pgfill = parsergen.oper_fill (
-        device,
-        ('show_interface_<WORD>', [], {'ifname':'mgmt0'}),
-        attrValPairsToParse,
-        refresh_cache=True, regex_tag_fill_pattern='show\.intf')
+    def parse():
+        output = device.execute('show interface brief')
+
+        pgfill = parsergen.oper_fill (
+            device,
+            command,
+            attrValPairsToParse,
+            refresh_cache=True, regex_tag_fill_pattern=r'show\.intf')
+
+        if not pgfill.parse():
+            return None
+        # The result now lives in the bounded cache only
+        return parsergen.ext_dictio.pop(device.name, None)
+
+    return cache.get_or_parse(device, *command, parse)
+
+def configure(device, config, cache=PARSE_CACHE):
+    # Parsed outputs of a device are stale once its configuration changed
+    device.configure(config)
+    cache.invalidate(device)
+
+def parse_cli_single_pass(device):
+    # One 'show interface' for every interface, all show.intf tags are
+    # extracted in a single pass instead of one oper_fill per interface
+    output = device.execute('show interface')
+
+    attrValPairsToParse = [
+        ('show.intf.if_name', 'mgmt0'),
+    ]
+
+    regexes = {tag: getattr(regex, 'pattern', regex) for tag, regex
+               in registries.regexes()[device.os].items()}
+    # The markup's if_name regex also matches lines such as 'admin state
+    # is up', so sections start at unindented '<name> is up/down' lines
+    extractor = SinglePassExtractor(regexes, section_tag='show.intf.if_name',
+                                    fill_pattern=r'show\.intf',
+                                    section_start=r'^\S+ is (?:up|down)')
+    return extractor.extract(output, attrValPairsToParse)
 
-    result = pgfill.parse()
-    return parsergen.ext_dictio[device.name]
-    
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Arguments for '
@@ -46,6 +83,14 @@ if __name__ == '__main__':
                         help='Name or alias of the device to parse on',
                         default = 'uut')
 
+    parser.add_argument('-single_pass',
+                        help='Extract all tags in one pass over the output',
+                        action='store_true')
+
+    parser.add_argument('-repeat',
+                        help='Parse this many times, reusing cached results',
+                        type=int, default=1)
+
     custom_args = parser.parse_known_args()[0]
     testbed_file = custom_args.testbed_file
     device_name = custom_args.device
@@ -53,5 +98,10 @@ if __name__ == '__main__':
     device = load(testbed_file, device_name)
     device.connect()
 
-    cli_parsed = parse_cli(device)
+    if custom_args.single_pass:
+        cli_parsed = parse_cli_single_pass(device)
+    else:
+        for _ in range(custom_args.repeat):
+            cli_parsed = parse_cli(device)
     pprint.pprint(cli_parsed)
+    pprint.pprint(PARSE_CACHE.stats())
@@ -0,0 +1,106 @@
+#
+# imports
+#
+import time
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class ParseCache(object):
+    '''Bounded cache of parse results per (device, command, arguments).
+
+    parsergen.oper_fill() keeps every result in the module global
+    parsergen.ext_dictio[device.name], which only grows, and refresh_cache=True
+    is the only way to get a fresh parse. This cache instead:
+
+        - expires entries ttl seconds after they were parsed,
+        - keeps at most maxsize entries, evicting the least recently used,
+        - is invalidated explicitly, e.g. after configuring a device,
+        - counts hits, misses, expirations and evictions.
+
+        cache = ParseCache(maxsize=512, ttl=60)
+        result = cache.get_or_parse(device, 'show_interface_<WORD>', [],
+                                    {'ifname': 'mgmt0'}, parse)
+        cache.invalidate(device)
+
+    Cached results are shared between callers, do not modify them. It is
+    safe to use from several threads.
+    '''
+
+    def __init__(self, maxsize=256, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.evictions = 0
+
+    @staticmethod
+    def key(device, command, args=(), kwargs=None):
+        name = getattr(device, 'name', device)
+        return (name, command, tuple(args or ()),
+                tuple(sorted((kwargs or {}).items())))
+
+    def get(self, device, command, args=(), kwargs=None, default=None):
+        '''Fresh cached result, or default (counted as a miss).'''
+        key = self.key(device, command, args, kwargs)
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires, value = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return default
+
+    def put(self, device, command, args=(), kwargs=None, value=None):
+        key = self.key(device, command, args, kwargs)
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_parse(self, device, command, args, kwargs, parse):
+        '''Cached result, or the result of parse() which is then cached.
+
+        Failed parses (None or empty results) are not cached.
+        '''
+        value = self.get(device, command, args, kwargs, default=_MISSING)
+        if value is _MISSING:
+            value = parse()
+            if value:
+                self.put(device, command, args, kwargs, value)
+        return value
+
+    def invalidate(self, device=None, command=None):
+        '''Drop the entries of a device and/or command (all by default).
+
+        Returns the number of entries dropped.
+        '''
+        name = getattr(device, 'name', device)
+        with self._lock:
+            stale = [key for key in self._entries
+                     if (device is None or key[0] == name) and
+                        (command is None or key[1] == command)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self._entries), 'maxsize': self.maxsize,
+                    'hits': self.hits, 'misses': self.misses,
+                    'expired': self.expired, 'evictions': self.evictions,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,202 @@
+#
+# imports
+#
+import re
+import time
+import argparse
+from operator import itemgetter
+
+# Lazily advance a whole line at a time; sections are bounded through endpos
+_LINE_GAP = r'(?:[^\n]*\n)*?'
+
+
+class SinglePassExtractor(object):
+    '''Extract every regex tag of a command with one match per section.
+
+    regexes is an ordered {tag: regex} mapping (e.g. parsergen's registered
+    regexes for an OS, in registration order), each regex holding one group
+    for the value. The first tag (or section_tag) starts a new section every
+    time it matches, e.g. one section per interface of 'show interface'.
+    section_start replaces it with a regex of its own when the tag also
+    matches inside a section.
+
+    Like oper_fill(), every tag takes its first match in the section, searched
+    from the section start. Tags anchored with ^ are merged into one combined
+    regex per section:
+
+        (?:(?=LINES tag1))?(?:(?=LINES tag2))?...
+
+    each an optional lookahead from the section start that skips whole lines
+    until its tag matches, which is much cheaper than re.search() trying a
+    ^ regex at every position. All their fields come back from one match
+    object. The other tags usually start with literal text that re.search()
+    finds quickly, so they are searched one by one.
+    '''
+
+    def __init__(self, regexes, section_tag=None, fill_pattern=None,
+                 section_start=None):
+        if fill_pattern:
+            fill = re.compile(fill_pattern)
+            regexes = {tag: regex for tag, regex in regexes.items()
+                       if fill.match(tag)}
+        section_tag = section_tag or next(iter(regexes))
+        self.tags = [section_tag] + [tag for tag in regexes if tag != section_tag]
+        self.patterns = {tag: re.compile(regexes[tag], re.MULTILINE)
+                         for tag in self.tags}
+        self.section_start = re.compile(section_start, re.MULTILINE) \
+            if section_start else self.patterns[section_tag]
+
+        # A top level | could make part of a ^ regex match mid-line
+        lined = {tag for tag in self.tags
+                 if regexes[tag].startswith('^') and '|' not in regexes[tag]}
+        self.combined_tags = [tag for tag in self.tags if tag in lined]
+        self.searched = [(tag, self.patterns[tag]) for tag in self.tags
+                         if tag not in lined]
+
+        # Each tag's value is the first group of its regex, tags without one
+        # are wrapped in a group
+        steps = []
+        slots = []
+        count = 0
+        for tag in self.combined_tags:
+            groups = self.patterns[tag].groups
+            slots.append(count)
+            steps.append('(?:(?={}{}))?'.format(
+                _LINE_GAP, regexes[tag] if groups else '({})'.format(regexes[tag])))
+            count += groups or 1
+        self.combined = re.compile(''.join(steps), re.MULTILINE)
+        # itemgetter of a single slot returns a bare value, not a tuple
+        self._values = itemgetter(*slots) if len(slots) > 1 else \
+            (lambda groups: tuple(groups[slot] for slot in slots))
+
+    def sections(self, output):
+        '''Return one {tag: value} dict per section, in output order.'''
+        starts = [match.start() for match in self.section_start.finditer(output)]
+        ends = starts[1:] + [len(output)]
+        match = self.combined.match
+        values = self._values
+        combined_tags = self.combined_tags
+        searched = self.searched
+        sections = []
+        for start, end in zip(starts, ends):
+            section = {tag: value for tag, value in
+                       zip(combined_tags, values(match(output, start, end).groups()))
+                       if value is not None}
+            for tag, pattern in searched:
+                found = pattern.search(output, start, end)
+                if found:
+                    section[tag] = found.group(1) if pattern.groups else found.group()
+            sections.append(section)
+        return sections
+
+    def extract(self, output, attr_vals=()):
+        '''Fields of the first section whose attr/value pairs all match.
+
+        Same selection as parsergen.oper_fill(): e.g.
+        [('show.intf.if_name', 'mgmt0')] picks the mgmt0 section.
+        '''
+        for section in self.sections(output):
+            if all(str(section.get(tag)) == str(value) for tag, value in attr_vals):
+                return section
+        return {}
+
+
+def extract_per_tag(regexes, output, section_tag=None):
+    '''Reference implementation: one search per tag and section.
+
+    This is how filling tag by tag behaves, every tag rescans the section
+    text from its start. Kept for the benchmark below.
+    '''
+    patterns = {tag: re.compile(regex, re.MULTILINE) for tag, regex in regexes.items()}
+    section_tag = section_tag or next(iter(regexes))
+    starts = [m.start() for m in patterns[section_tag].finditer(output)]
+    sections = []
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(output)
+        section = {}
+        for tag, pattern in patterns.items():
+            match = pattern.search(output, start, end)
+            if match:
+                section[tag] = match.group(1) if pattern.groups else match.group()
+        sections.append(section)
+    return sections
+
+
+#
+# Benchmark on a synthetic 'show interface' of many NX-OS interfaces
+#
+BENCHMARK_REGEXES = {
+    'show.intf.if_name': r'^(\S+) is (?:up|down)',
+    'show.intf.line_protocol': r'^\S+ is (\S+)',
+    'show.intf.admin_state': r'^admin state is (\S+)',
+    'show.intf.hardware': r'^\s+Hardware: (\S+), address',
+    'show.intf.mac_address': r'address: ([0-9a-f.]+) \(bia',
+    'show.intf.bia_address': r'\(bia ([0-9a-f.]+)\)',
+    'show.intf.ip_address': r'^\s+Internet Address is ([0-9.]+)',
+    'show.intf.mtu': r'^\s+MTU (\d+) bytes',
+    'show.intf.bw': r'BW (\d+) Kbit',
+    'show.intf.dly': r'DLY (\d+) usec',
+    'show.intf.reliability': r'reliability ([0-9/]+)',
+    'show.intf.txload': r'txload ([0-9/]+)',
+    'show.intf.rxload': r'rxload ([0-9/]+)',
+    'show.intf.encapsulation': r'^\s+Encapsulation (\S+), medium',
+    'show.intf.port_mode': r'^\s+Port mode is (\S+)',
+    'show.intf.auto_negotiation': r'^\s+Auto-Negotiation is turned (\S+)',
+    'show.intf.auto_mdix': r'^\s+Auto-mdix is turned (\S+)',
+    'show.intf.ether_type': r'^\s+EtherType is (\S+)',
+    'show.intf.input_bits_sec_60': r'minute input rate (\d+) bits/sec',
+    'show.intf.output_bits_sec_60': r'minute output rate (\d+) bits/sec',
+    'show.intf.input_packets': r'^\s+(\d+) input packets',
+    'show.intf.output_packets': r'^\s+(\d+) output packets',
+}
+
+BENCHMARK_INTERFACE = '''\
+{name} is up
+admin state is up
+  Hardware: Ethernet, address: 5254.0070.{n:04x} (bia 5254.0070.{n:04x})
+  Internet Address is 10.{a}.{b}.5/24
+  MTU 1500 bytes, BW {n} Kbit, DLY 10 usec
+  reliability 255/255, txload 1/255, rxload 1/255
+  Encapsulation ARPA, medium is broadcast
+  Port mode is routed
+  auto-duplex, auto-speed
+  Auto-Negotiation is turned on
+  Auto-mdix is turned off
+  EtherType is 0x0000
+  1 minute input rate {n} bits/sec, 0 packets/sec
+  1 minute output rate 24 bits/sec, 0 packets/sec
+  Rx
+    {n} input packets 2 unicast packets 68 multicast packets
+    1 broadcast packets 22451 bytes
+  Tx
+    33 output packets 1 unicast packets 29 multicast packets
+    3 broadcast packets 6527 bytes
+'''
+
+
+def benchmark(interfaces=1000, repeat=3):
+    output = ''.join(BENCHMARK_INTERFACE.format(
+        name='Ethernet1/{}'.format(n), n=n, a=n // 250, b=n % 250)
+        for n in range(1, interfaces + 1))
+
+    extractor = SinglePassExtractor(BENCHMARK_REGEXES)
+    assert extractor.sections(output) == extract_per_tag(BENCHMARK_REGEXES, output)
+
+    for name, func in (('per tag', lambda: extract_per_tag(BENCHMARK_REGEXES, output)),
+                       ('single pass', lambda: extractor.sections(output))):
+        best = min(_timed(func) for _ in range(repeat))
+        print('{:<12} {} interfaces, {} tags: {:.1f} ms'.format(
+            name, interfaces, len(BENCHMARK_REGEXES), best * 1000))
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Single pass extraction benchmark')
+    parser.add_argument('-interfaces', type=int, default=1000)
+    custom_args = parser.parse_known_args()[0]
+    benchmark(custom_args.interfaces)
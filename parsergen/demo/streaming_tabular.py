@@ -0,0 +1,307 @@
+#
+# imports
+#
+import re
+import time
+import argparse
+import tracemalloc
+
+from compact_entries import Schema, wrap_rows
+
+_SEPARATOR = re.compile(r'^[-=+\s]+$')
+
+
+#
+# Chunk sources
+#
+def string_chunks(text, size=65536):
+    '''Yield text in chunks of size characters, e.g. a captured output.'''
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def file_chunks(file, size=65536):
+    '''Yield a log or capture file in chunks, without reading it whole.'''
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def device_chunks(device, command, prompt=r'[^\s#>]+[#>]\s*', timeout=300,
+                  quiet=0.5, poll=0.05):
+    '''Yield the output of command as it arrives on a unicon connection.
+
+    The command is sent with sendline() and the spawn is read until the
+    device prompt comes back, so parsing runs while the rest of the table
+    is still being transferred. The prompt itself is not yielded.
+
+    Reads that return nothing are retried every poll seconds. The last,
+    incomplete line is only taken for the prompt once nothing arrived for
+    quiet seconds, so a row cut after e.g. "foo#" does not end the output.
+    '''
+    prompt = re.compile(prompt)
+    device.sendline(command)
+    deadline = time.monotonic() + timeout
+    pending = ''
+    idle_since = None
+    while time.monotonic() < deadline:
+        chunk = device.spawn.read()
+        if chunk:
+            idle_since = None
+            pending += chunk
+            # The last, incomplete line is held back until it is known not
+            # to be the prompt
+            head, _, last = pending.rpartition('\n')
+            if head:
+                yield head + '\n'
+                pending = last
+            continue
+        now = time.monotonic()
+        if idle_since is None:
+            idle_since = now
+        elif now - idle_since >= quiet and prompt.fullmatch(pending):
+            return
+        time.sleep(poll)
+    raise TimeoutError("No prompt after '{}' within {}s".format(command, timeout))
+
+
+def iter_lines(chunks):
+    '''Reassemble complete lines from arbitrary chunks.'''
+    partial = ''
+    for chunk in chunks:
+        lines = (partial + chunk).split('\n')
+        partial = lines.pop()
+        for line in lines:
+            yield line.rstrip('\r')
+    if partial:
+        yield partial.rstrip('\r')
+
+
+#
+# Parser
+#
+class StreamingTabular(object):
+    '''oper_fill_tabular for output that arrives in chunks.
+
+    Takes the same header_fields, label_fields, index, field_mapping,
+    table_title_pattern, table_terminal_pattern and table_title_mapping
+    arguments, but instead of the full output string, parse() consumes an
+    iterator of chunks (see device_chunks) and yields (title, key, entry)
+    as soon as each row is complete. Only the current line is held, so
+    memory stays flat however large the table is.
+
+    The state machine follows the output: wait for a title (when a
+    table_title_pattern is given), then for the header lines, then take
+    rows until a blank line, a separator or the terminal pattern ends the
+    table, and go back to waiting for the next title.
+
+    Subclasses may override cleanup_entry_field(header, field), like with
+    oper_fill_tabular.
+    '''
+
+    def __init__(self, header_fields, label_fields=None, index=(0,),
+                 field_mapping=None, table_title_pattern=None,
+                 table_terminal_pattern=None, table_title_mapping=None):
+        if header_fields and isinstance(header_fields[0], str):
+            header_fields = [header_fields]
+        self.header_fields = header_fields
+        self.labels = list(label_fields or header_fields[0])
+        self.index = list(index)
+        self.field_mapping = field_mapping or {}
+        self.title_pattern = re.compile(table_title_pattern) \
+            if table_title_pattern else None
+        self.terminal_pattern = re.compile(table_terminal_pattern) \
+            if table_terminal_pattern else None
+        self.title_mapping = table_title_mapping or []
+        self.header_patterns = [
+            re.compile(r'\s+'.join(field for field in fields if field))
+            for fields in header_fields]
+
+    def cleanup_entry_field(self, header, field):
+        return field
+
+    def _title(self, match):
+        groups = match.groups() or (match.group(),)
+        values = [convert(value) if convert else value for convert, value in
+                  zip(list(self.title_mapping) + [None] * len(groups), groups)]
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def _spans(self, header_line):
+        starts = []
+        position = 0
+        for field in self.header_fields[0]:
+            match = re.compile(field).search(header_line, position)
+            starts.append(match.start())
+            position = match.end()
+        return list(zip(starts, starts[1:] + [None]))
+
+    @staticmethod
+    def _split(line, spans):
+        '''Cut line at the header positions, without splitting a value.
+
+        A value spilling to the left of its header moves the cut back to
+        the blank before it.
+        '''
+        cuts = [start for start, _ in spans]
+        for column in range(1, len(cuts)):
+            cut = cuts[column]
+            if 0 < cut < len(line) and line[cut] != ' ' and line[cut - 1] != ' ':
+                blank = line.rfind(' ', cuts[column - 1], cut)
+                if blank != -1:
+                    cuts[column] = blank + 1
+        return [line[start:end] for start, end in zip(cuts, cuts[1:] + [None])]
+
+    def _entry(self, line, spans):
+        entry = {}
+        for label, field in zip(self.labels, self._split(line, spans)):
+            field = self.cleanup_entry_field(label, field.strip())
+            convert = self.field_mapping.get(label)
+            entry[label] = convert(field) if convert else field
+        return entry
+
+    def parse(self, chunks):
+        '''Yield (title, key, entry) for every row as it is read.
+
+        title is None without a table_title_pattern and key is a tuple when
+        index has several columns.
+        '''
+        title = None
+        state = 'title' if self.title_pattern else 'header'
+        header_line = None
+        header_matched = 0
+        spans = None
+
+        for line in iter_lines(chunks):
+            if self.title_pattern:
+                match = self.title_pattern.search(line)
+                if match:
+                    title = self._title(match)
+                    state, header_matched = 'header', 0
+                    continue
+
+            if state == 'header':
+                if self.header_patterns[header_matched].search(line):
+                    if header_matched == 0:
+                        header_line = line
+                    header_matched += 1
+                    if header_matched == len(self.header_patterns):
+                        spans = self._spans(header_line)
+                        state = 'before rows'
+                elif header_matched:
+                    # Not the rest of the header, maybe the start of another
+                    header_matched = 0
+                    if self.header_patterns[0].search(line):
+                        header_line, header_matched = line, 1
+                continue
+
+            if state in ('before rows', 'rows'):
+                if self.terminal_pattern and self.terminal_pattern.search(line):
+                    state = 'title' if self.title_pattern else 'header'
+                    header_matched = 0
+                    continue
+                if not line.strip() or _SEPARATOR.match(line):
+                    if state == 'rows':
+                        state = 'title' if self.title_pattern else 'header'
+                        header_matched = 0
+                    continue
+                state = 'rows'
+                entry = self._entry(line, spans)
+                keys = tuple(entry[self.labels[position]] for position in self.index)
+                yield title, keys[0] if len(keys) == 1 else keys, entry
+
+    def collect(self, chunks, compact=False):
+        '''Build the oper_fill_tabular-shaped entries from a stream.
+
+        entries[title][key][label] with a table_title_pattern, and
+        entries[key][label] without; several index columns nest keys.
+        With compact=True rows are stored as tuples of one shared schema
+        and returned as a read-only compact_entries view.
+        '''
+        schema = Schema.of(self.labels) if compact else None
+        entries = {}
+        for title, key, entry in self.parse(chunks):
+            level = entries.setdefault(title, {}) if self.title_pattern else entries
+            keys = key if isinstance(key, tuple) else (key,)
+            for part in keys[:-1]:
+                level = level.setdefault(part, {})
+            level[keys[-1]] = schema.row(entry) if compact else entry
+        if compact:
+            depth = len(self.index) + (1 if self.title_pattern else 0)
+            return wrap_rows(entries, schema, depth)
+        return entries
+
+
+#
+# Example and memory benchmark on 'show isis database'
+#
+ISIS_OUTPUT = '''
+RP/0/0/CPU0:iox#show isis database
+Wed Dec 16 09:48:55.017 EST
+
+IS-IS ring (Level-1) Link State Database
+LSPID                 LSP Seq Num  LSP Checksum  LSP Holdtime  ATT/P/OL
+iox.00-00           * 0x00000008   0xf9fd        1003            0/0/0
+ioxbfd.00-00          0x00000004   0x8f36        862             0/0/0
+
+Total Level-1 LSP count: 4     Local Level-1 LSP count: 1
+
+IS-IS ring (Level-2) Link State Database
+LSPID                 LSP Seq Num  LSP Checksum  LSP Holdtime  ATT/P/OL
+iox.00-00           * 0x00000009   0x351a        1003            0/0/0
+iox.01-00             0x00000002   0x0ead        922             0/0/0
+
+Total Level-2 LSP count: 4     Local Level-2 LSP count: 1
+'''
+ISIS_HEADERS = ["LSPID", "LSP Seq Num", "LSP Checksum", "LSP Holdtime", "ATT/P/OL"]
+ISIS_ROW = '{:<22}0x{:08x}   0x{:04x}        {:<16}0/0/0\n'
+
+
+def isis_parser():
+    return StreamingTabular(
+        header_fields=ISIS_HEADERS,
+        table_terminal_pattern="Total Level-[12] LSP count:",
+        table_title_pattern=r"IS-IS (?:[-\w]+ )?\(?Level-([12])\)? Link State Database:?",
+        table_title_mapping=[int])
+
+
+def synthetic_isis(rows):
+    '''Yield a huge two level 'show isis database' piece by piece.'''
+    for level in (1, 2):
+        yield 'IS-IS ring (Level-{}) Link State Database\n'.format(level)
+        yield 'LSPID                 LSP Seq Num  LSP Checksum  LSP Holdtime  ATT/P/OL\n'
+        for n in range(rows):
+            yield ISIS_ROW.format('r{}.00-00'.format(n), n, n & 0xffff, n % 1200)
+        yield '\nTotal Level-{} LSP count: {}\n\n'.format(level, rows)
+
+
+def benchmark(rows=200000):
+    parser = isis_parser()
+
+    tracemalloc.start()
+    output = ''.join(synthetic_isis(rows))
+    count = sum(1 for _ in parser.parse(string_chunks(output)))
+    full = tracemalloc.get_traced_memory()[1]
+    del output
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    streamed = sum(1 for _ in parser.parse(synthetic_isis(rows)))
+    stream = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert count == streamed == 2 * rows
+    print('{} entries, peak with the full output in memory {:.1f} MB, '
+          'streamed {:.2f} MB'.format(count, full / 1e6, stream / 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Streaming tabular parser example')
+    parser.add_argument('-rows', type=int, default=200000)
+    custom_args = parser.parse_known_args()[0]
+
+    # Even 7 character chunks give the same entries as the whole output
+    entries = isis_parser().collect(string_chunks(ISIS_OUTPUT, 7))
+    print(entries[2]['iox.01-00'])
+    benchmark(custom_args.rows)
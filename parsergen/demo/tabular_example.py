@@ -7,6 +7,9 @@ import argparse
 from genie import parsergen
 from pyats.topology import loader
 
+from bulk_tabular import BulkTable
+from streaming_tabular import StreamingTabular, device_chunks
+
 
 def load(testbed, device_name):
     tb = loader.load(testbed)
@@ -30,6 +33,32 @@ def parse_cli(device):
 
     return result
 
+def parse_cli_bulk(device):
+    # Same table, column spans computed once and columns sliced in bulk;
+    # meant for tables of tens of thousands of rows
+    output = device.execute('show interface brief')
+    result = BulkTable(
+            device_output= output,
+            header_fields= [['Ethernet', 'VLAN', 'Type', 'Mode', 'Status', 'Reason', 'Speed', 'Port'],
+                            ['Interface', '', '', '', '', '', '', 'Ch \#']],
+            label_fields=['Ethernet Interface', 'VLAN', 'Type',
+                          'Mode', 'Status', 'Reason', 'Speed', 'Port'],
+            index= [0])
+
+    return result
+
+def parse_cli_stream(device):
+    # Rows are parsed while 'show interface brief' is still arriving,
+    # the whole output is never held in memory
+    parser = StreamingTabular(
+            header_fields= [['Ethernet', 'VLAN', 'Type', 'Mode', 'Status', 'Reason', 'Speed', 'Port'],
+                            ['Interface', '', '', '', '', '', '', 'Ch \#']],
+            label_fields=['Ethernet Interface', 'VLAN', 'Type',
+                          'Mode', 'Status', 'Reason', 'Speed', 'Port'],
+            index= [0])
+
+    return parser.collect(device_chunks(device, 'show interface brief'))
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Arguments for '
@@ -42,6 +71,14 @@ if __name__ == '__main__':
                         help='Name or alias of the device to parse on',
                         default = 'uut')
 
+    parser.add_argument('-bulk',
+                        help='Parse with the bulk column engine',
+                        action='store_true')
+
+    parser.add_argument('-stream',
+                        help='Parse the output while it is received',
+                        action='store_true')
+
     custom_args = parser.parse_known_args()[0]
     testbed_file = custom_args.testbed_file
     device_name = custom_args.device
@@ -49,5 +86,11 @@ if __name__ == '__main__':
     device = load(testbed_file, device_name)
     device.connect()
 
-    cli_parsed = parse_cli(device)
-    pprint.pprint(cli_parsed.entries)
+    if custom_args.stream:
+        pprint.pprint(parse_cli_stream(device))
+    else:
+        if custom_args.bulk:
+            cli_parsed = parse_cli_bulk(device)
+        else:
+            cli_parsed = parse_cli(device)
+        pprint.pprint(cli_parsed.entries)
@@ -0,0 +1,205 @@
+'''command_templates.py
+
+Compiled parsergen show command templates.
+
+Commands registered through parsergen.extend(show_cmds=...) are templates such
+as "show {=ipv4} interface {if-name}", looked up by OS and key and filled in
+every time a command is run. Loops running one command per interface format
+the same few templates thousands of times, so this module:
+
+  - compiles each (os, key) template once into a callable, the literal text
+    split from its fields ahead of time,
+  - keeps the compiled templates in an index keyed by (os, key), filled from
+    the parsergen registry on first use instead of walking it every time,
+  - memoizes the resolved command string per argument tuple.
+
+    templates = CommandTemplates()
+    templates.format('iosxr', 'SHOW_IP_INTF', [None, 'Gi0/0/0/1'])
+    templates.format('nxos', 'SHOW_IP_INTF2', kwargs={'if-name': 'Eth1/1'})
+
+Templates are taken from the registry when first formatted. After changing
+an already used template, register it through extend() below, or call
+invalidate().
+
+The module imports registries relatively, so the timing loop below runs as:
+
+    python -m genie.parsergen.examples.parsergen.pyAts.command_templates \
+        -interfaces 5000
+'''
+
+import re
+import time
+import argparse
+import threading
+
+from genie import parsergen as pg
+
+from . import registries
+
+# Positional {} / {=default} and keyword {name} fields of a show command
+_FIELD = re.compile(r'\{(=?)([^{}]*)\}')
+
+
+def compile_template(template):
+    '''Return a callable filling template from (args, kwargs).
+
+    Positional fields take the next value of args: "{}" is required,
+    "{=ip}" defaults to "ip" when the argument is missing or None. Named
+    fields such as "{if-name}" come from kwargs. The result is the command
+    oper_fill() builds, whitespace included, and a missing argument raises
+    the same IndexError or KeyError.
+    '''
+    pieces = []
+    position = 0
+    end = 0
+    for match in _FIELD.finditer(template):
+        default, name = match.groups()
+        pieces.append(template[end:match.start()])
+        if name and not default:
+            pieces.append((None, name))
+        else:
+            pieces.append((position, name if default else None))
+            position += 1
+        end = match.end()
+    pieces.append(template[end:])
+
+    if position == 0 and len(pieces) == 1:
+        return lambda args=(), kwargs=None: template
+
+    def fill(args=(), kwargs=None):
+        args = args or ()
+        parts = []
+        for piece in pieces:
+            if isinstance(piece, str):
+                parts.append(piece)
+                continue
+            index, name = piece
+            if index is None:
+                parts.append(str((kwargs or {})[name]))
+                continue
+            if name is None:
+                value = args[index]
+                if value is None:
+                    raise IndexError()
+            else:
+                value = args[index] if index < len(args) else None
+                if value is None:
+                    value = name
+            parts.append(str(value))
+        return ''.join(parts)
+
+    fill.template = template
+    return fill
+
+
+class CommandTemplates(object):
+    '''Index of compiled show command templates with memoized results.
+
+    maxsize bounds the memoized command strings (per instance), the
+    compiled templates themselves are kept until invalidate().
+    '''
+
+    def __init__(self, registry=None, maxsize=65536):
+        self._registry = registry
+        self.maxsize = maxsize
+        self._index = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @property
+    def registry(self):
+        return registries.show_commands() if self._registry is None \
+            else self._registry
+
+    def compiled(self, os_, key):
+        '''Compiled template of key for os_, KeyError when not registered.'''
+        try:
+            return self._index[os_, key]
+        except KeyError:
+            fill = compile_template(self.registry[os_][key])
+            with self._lock:
+                return self._index.setdefault((os_, key), fill)
+
+    def format(self, os_, key, args=(), kwargs=None):
+        '''Command string of key for os_ filled with args and kwargs.'''
+        try:
+            memo = (os_, key, tuple(args or ()),
+                    tuple(sorted(kwargs.items())) if kwargs else ())
+            command = self._resolved[memo]
+        except TypeError:
+            # Unhashable arguments, format without memoizing
+            return self.compiled(os_, key)(args, kwargs)
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return command
+
+        command = self.compiled(os_, key)(args, kwargs)
+        with self._lock:
+            self.misses += 1
+            if len(self._resolved) >= self.maxsize:
+                self._resolved.clear()
+            self._resolved[memo] = command
+        return command
+
+    def invalidate(self, os_=None, key=None):
+        '''Forget compiled templates and commands of an os and/or key.'''
+        def stale(entry):
+            return (os_ is None or entry[0] == os_) and \
+                   (key is None or entry[1] == key)
+        with self._lock:
+            for index in [entry for entry in self._index if stale(entry)]:
+                del self._index[index]
+            for memo in [entry for entry in self._resolved if stale(entry)]:
+                del self._resolved[memo]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'templates': len(self._index), 'commands': len(self._resolved),
+                'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+# Shared by the helpers below and fanout.py
+templates = CommandTemplates()
+
+
+def format_command(os_, key, args=(), kwargs=None):
+    return templates.format(os_, key, args, kwargs)
+
+
+def extend(show_cmds=None, **kwargs):
+    '''parsergen.extend() that also drops the replaced compiled templates.'''
+    pg.extend(show_cmds=show_cmds, **kwargs)
+    for os_, commands in (show_cmds or {}).items():
+        for key in commands:
+            templates.invalidate(os_, key)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Format per-interface '
+                                                 'show commands')
+    parser.add_argument('-interfaces', type=int, default=5000)
+    parser.add_argument('-passes', type=int, default=3)
+    custom_args = parser.parse_known_args()[0]
+
+    extend(show_cmds={
+        'iosxr': {'SHOW_IP_INTF': "show {=ipv4} interface {}",
+                  'SHOW_IP_INTF2': "show {=ipv4} interface {if-name}"},
+        'nxos': {'SHOW_IP_INTF': "show {=ip} interface {}",
+                 'SHOW_IP_INTF2': "show {=ip} interface {if-name}"}})
+    names = ['GigabitEthernet0/0/0/{}'.format(n)
+             for n in range(custom_args.interfaces)]
+
+    for number in range(custom_args.passes):
+        start = time.perf_counter()
+        for os_ in ('iosxr', 'nxos'):
+            for name in names:
+                format_command(os_, 'SHOW_IP_INTF', [None, name])
+                format_command(os_, 'SHOW_IP_INTF2', kwargs={'if-name': name})
+        print('pass {}: {} commands in {:.1f} ms'.format(
+            number + 1, 4 * len(names), (time.perf_counter() - start) * 1e3))
+    print(format_command('nxos', 'SHOW_IP_INTF2', kwargs={'if-name': names[-1]}))
+    print(templates.stats())
@@ -0,0 +1,226 @@
+'''fanout.py
+
+Run parsergen commands across a whole testbed at once.
+
+The demos run show commands and parse them on a single uut. fan_out() takes a
+testbed, the parsergen command keys to run (registered through
+parsergen.extend(show_cmds=...)) and a device filter. It then:
+
+  - connects to and executes on every selected device concurrently, one
+    thread per connection, since execution mostly waits on the devices,
+  - parses each output with parsergen.oper_fill() in a process pool, so
+    parsing uses every core, through a picklable stub device that replays
+    the captured output,
+  - yields (device name, [parsed result of each command]) as soon as all
+    the commands of a device are parsed.
+
+    for name, results in fan_out(testbed, ['show_interface_<WORD>'],
+                                 device_filter={'os': 'iosxr'}):
+        ...
+
+A command is a key, or a (key, args, kwargs) tuple as given to oper_fill(),
+optionally followed by its own attribute/value pairs, so the same key can
+be run with different arguments, e.g. once per interface:
+
+    commands = [('show_interface_<WORD>', [], {'ifname': name},
+                 [('show.intf.if_name', name)]) for name in interfaces]
+
+Results are in the order of the commands. A failure on a device (connection,
+execution or parsing) is returned as the exception in place of the parsed
+result, the other devices carry on.
+
+The parsing processes are spawned rather than forked, since the execution
+threads are already running, and get the parent's registered commands and
+regexes through registries.py.
+'''
+
+import os
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor,
+                                FIRST_COMPLETED, wait)
+
+from genie import parsergen as pg
+
+from . import registries
+from .command_templates import format_command
+
+log = logging.getLogger(__name__)
+
+
+def _command_spec(command):
+    if isinstance(command, str):
+        return command, [], {}, None
+    key, args, kwargs, attr_vals = (list(command) + [[], {}, None])[:4]
+    return key, list(args or []), dict(kwargs or {}), attr_vals
+
+
+def select_devices(testbed, device_filter=None):
+    '''Devices of testbed matching device_filter.
+
+    device_filter may be None (every device), a callable taking a device,
+    a list of device names or aliases, or a dict of device attribute to
+    accepted value(s), e.g. {'os': ['iosxr', 'nxos'], 'type': 'router'}.
+    '''
+    devices = list(testbed.devices.values())
+    if device_filter is None:
+        return devices
+    if callable(device_filter):
+        return [device for device in devices if device_filter(device)]
+    if isinstance(device_filter, dict):
+        def accepted(device):
+            for attribute, wanted in device_filter.items():
+                if isinstance(wanted, (str, int)):
+                    wanted = [wanted]
+                if getattr(device, attribute, None) not in wanted:
+                    return False
+            return True
+        return [device for device in devices if accepted(device)]
+    names = set(device_filter)
+    return [device for device in devices
+            if device.name in names or getattr(device, 'alias', None) in names]
+
+
+class _OutputDevice(object):
+    '''Picklable stand-in for a device, replaying one captured output.
+
+    Gives oper_fill() what it uses of a device in the parsing processes.
+    Each parse runs exactly the command whose output was captured, so the
+    output is returned whatever the command string oper_fill() built.
+    '''
+
+    def __init__(self, name, os, output):
+        self.name = name
+        self.os = os
+        self.output = output
+
+    def is_connected(self):
+        return True
+
+    def execute(self, command, *args, **kwargs):
+        return self.output
+
+
+def _init_worker(show_cmds, regexes, regex_tags):
+    '''Register the parent's commands and regexes in a parsing process.'''
+    pg.extend(show_cmds=show_cmds, regex_ext=regexes, regex_tags=regex_tags)
+
+
+def _parse(name, os_, command, output, attr_vals, regex_tag_fill_pattern):
+    '''Parse one captured output with oper_fill(), in a worker process.'''
+    key, args, kwargs = command[:3]
+    device = _OutputDevice(name, os_, output)
+    pgfill = pg.oper_fill(device, (key, args, kwargs), attr_vals,
+                          refresh_cache=True,
+                          regex_tag_fill_pattern=regex_tag_fill_pattern)
+    if not pgfill.parse():
+        raise ValueError('{}: {} did not parse: {}'.format(name, key, pgfill))
+    # Do not let the worker's parsergen.ext_dictio grow with every device
+    return pg.ext_dictio.pop(name, {})
+
+
+def _execute(device, commands):
+    '''Connect if needed and run every command, in a thread.'''
+    if not device.is_connected():
+        device.connect()
+    outputs = []
+    for key, args, kwargs, _ in commands:
+        outputs.append(device.execute(format_command(device.os, key,
+                                                     args, kwargs)))
+    return outputs
+
+
+def fan_out(testbed, commands, device_filter=None, attr_vals=None,
+            regex_tag_fill_pattern=None, connections=16, processes=None):
+    '''Execute and parse commands on many devices, yield results per device.
+
+    attr_vals maps a command key to the attribute/value pairs given to
+    oper_fill() for commands without pairs of their own (none by default).
+    connections bounds the devices executing at the same time, processes
+    the parsing processes (one per core by default). Results come as
+    (device name, [parsed dict or exception, one per command]) in
+    completion order.
+    '''
+    commands = [_command_spec(command) for command in commands]
+    attr_vals = attr_vals or {}
+    devices = select_devices(testbed, device_filter)
+    if not devices:
+        return
+
+    with ThreadPoolExecutor(
+            max_workers=min(connections, len(devices))) as threads, \
+         ProcessPoolExecutor(max_workers=processes or os.cpu_count(),
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=registries.snapshot()) as pool:
+        executing = {threads.submit(_execute, device, commands): device
+                     for device in devices}
+        parsing = {}
+        # Parsed results by device, in command order, and how many are due
+        results = {}
+        remaining = {}
+
+        while executing or parsing:
+            done, _ = wait(list(executing) + list(parsing),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in executing:
+                    device = executing.pop(future)
+                    try:
+                        outputs = future.result()
+                    except Exception as e:
+                        log.error('{}: execution failed: {}'.format(
+                            device.name, e))
+                        yield device.name, [e] * len(commands)
+                        continue
+                    results[device.name] = [None] * len(commands)
+                    remaining[device.name] = len(commands)
+                    for index, (command, output) in enumerate(
+                            zip(commands, outputs)):
+                        parsing[pool.submit(
+                            _parse, device.name, device.os, command, output,
+                            command[3] if command[3] is not None
+                            else attr_vals.get(command[0], []),
+                            regex_tag_fill_pattern)] = (device.name, index)
+                else:
+                    name, index = parsing.pop(future)
+                    try:
+                        results[name][index] = future.result()
+                    except Exception as e:
+                        log.error('{}: {} failed: {}'.format(
+                            name, commands[index][0], e))
+                        results[name][index] = e
+                    remaining[name] -= 1
+                    if not remaining[name]:
+                        del remaining[name]
+                        yield name, results.pop(name)
+
+
+if __name__ == '__main__':
+    from pprint import pprint
+    from pyats.topology import loader
+    # Registers show_interface_<WORD> and SHOW_ARP
+    from genie.parsergen.examples.parsergen.pyAts import parsergen_demo_mkpg
+
+    parser = argparse.ArgumentParser(description='Run parsergen commands '
+                                                 'on many devices')
+    parser.add_argument('-testbed_file', default='virl.yaml')
+    parser.add_argument('-os', nargs='*', help='only devices of these OSes')
+    parser.add_argument('-command', nargs='+',
+                        default=['show_interface_<WORD>'],
+                        help='parsergen command keys')
+    parser.add_argument('-ifname', default='',
+                        help='interface for {ifname} commands, all by default')
+    parser.add_argument('-connections', type=int, default=16)
+    custom_args = parser.parse_known_args()[0]
+
+    testbed = loader.load(custom_args.testbed_file)
+    device_filter = {'os': custom_args.os} if custom_args.os else None
+    commands = [(key, [], {'ifname': custom_args.ifname})
+                for key in custom_args.command]
+    for name, results in fan_out(testbed, commands, device_filter,
+                                 regex_tag_fill_pattern='show\\.intf',
+                                 connections=custom_args.connections):
+        print(name)
+        pprint(dict(zip(custom_args.command, results)))
@@ -0,0 +1,248 @@
+'''markup_cache.py
+
+Ahead-of-time compilation of parsergen markup.
+
+parsergen.extend_markup() turns every MARKUP block into regexes each time the
+module holding the markup is imported. This module runs that translation once,
+stores the resulting show commands, regexes, regex tag order and per-field
+metadata as a versioned JSON artifact, and on later imports registers the
+artifact through the public parsergen.extend() instead of re-translating the
+markup. Regexes are only compiled when first requested through pattern().
+
+Artifacts are keyed by a digest of the markup text, so editing a markup (or
+upgrading genie, or bumping CACHE_FORMAT_VERSION) simply produces a new one.
+
+To precompile ahead of time (e.g. when building a test image):
+
+    python -m genie.parsergen.examples.parsergen.pyAts.markup_cache [--refresh]
+'''
+
+import os
+import re
+import json
+import hashlib
+import logging
+import argparse
+import functools
+
+from genie import parsergen as pg
+
+from . import registries
+
+log = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '.markup_cache')
+
+# Header lines of a markup block, e.g. "OS: iosxr" or "SHOWCMD: show ..."
+_HEADER = re.compile(r'^(OS|CMD|SHOWCMD|PREFIX):\s*(.*?)\s*$')
+# Field markers: XN<mtu>X, Xa<via>X and XXX<[^,]+><hardware>XXX
+_FIELD = re.compile(r'XXX<(?P<regex>.+?)><(?P<xname>[^<>]+)>XXX'
+                    r'|X(?P<code>[A-Za-z])<(?P<name>[^<>]+)>X')
+
+# Regexes registered through this module, by os then tag
+_registered = {}
+
+
+def _genie_version():
+    try:
+        from genie import __version__
+    except ImportError:
+        try:
+            from importlib.metadata import version
+            return version('genie')
+        except Exception:
+            return 'unknown'
+    return __version__
+
+
+def split_markup(text):
+    '''Split a multi-command markup string into one dict per OS/CMD block.
+
+    Each block has the keys os, cmd, showcmd, prefix, actual and markup, the
+    last two holding the raw ACTUAL: and MARKUP: sections.
+    '''
+    blocks = []
+    block = None
+    section = None
+    for line in text.splitlines():
+        header = _HEADER.match(line)
+        if header and header.group(1) == 'OS':
+            block = {'os': header.group(2), 'cmd': '', 'showcmd': '',
+                     'prefix': '', 'actual': [], 'markup': []}
+            blocks.append(block)
+            section = None
+        elif block is None:
+            continue
+        elif header and section is None:
+            block[header.group(1).lower()] = header.group(2)
+        elif line.strip() in ('ACTUAL:', 'MARKUP:'):
+            section = line.strip()[:-1].lower()
+        elif section:
+            block[section].append(line)
+
+    for block in blocks:
+        for section in ('actual', 'markup'):
+            block[section] = '\n'.join(block[section]).strip('\n') + '\n'
+    return blocks
+
+
+def markup_fields(markup):
+    '''Return {field name: markup code} for a MARKUP section.
+
+    The code is the single letter of XN<..>X style markers, or 'XXX' for
+    markers carrying their own regex.
+    '''
+    fields = {}
+    for match in _FIELD.finditer(markup):
+        if match.group('xname'):
+            fields[match.group('xname')] = 'XXX'
+        else:
+            fields[match.group('name')] = match.group('code')
+    return fields
+
+
+def _snapshot():
+    '''Copy of parsergen's regex registries, to diff around extend_markup().'''
+    return registries.snapshot()[1:]
+
+
+def compile_markup(text):
+    '''Register text with parsergen.extend_markup() and return its artifact.'''
+    regex_before, tags_before = _snapshot()
+    pg.extend_markup(text)
+    regex_after, tags_after = _snapshot()
+
+    blocks = split_markup(text)
+    artifact = {
+        'version': CACHE_FORMAT_VERSION,
+        'genie_version': _genie_version(),
+        'digest': markup_digest(text),
+        'show_cmds': {},
+        'regex': {},
+        'regex_tags': {},
+        'fields': [],
+    }
+
+    for block in blocks:
+        artifact['show_cmds'].setdefault(block['os'].lower(), {})[block['cmd']] = \
+            block['showcmd']
+
+    for os_, tags in tags_after.items():
+        known = set(tags_before.get(os_, []))
+        new_tags = [tag for tag in tags if tag not in known]
+        if not new_tags:
+            continue
+        artifact['regex_tags'][os_] = new_tags
+        artifact['regex'][os_] = {tag: regex_after[os_][tag] for tag in new_tags}
+
+        # Attach each tag to the block (and markup code) it came from
+        for block in blocks:
+            if block['os'].lower() != os_.lower():
+                continue
+            codes = markup_fields(block['markup'])
+            prefix = block['prefix'] + '.' if block['prefix'] else ''
+            for tag in new_tags:
+                field = tag[len(prefix):] if tag.startswith(prefix) else None
+                if field in codes:
+                    artifact['fields'].append({
+                        'os': os_, 'cmd': block['cmd'], 'prefix': block['prefix'],
+                        'tag': tag, 'field': field, 'code': codes[field]})
+
+    return artifact
+
+
+def markup_digest(text):
+    key = '{}:{}:{}'.format(CACHE_FORMAT_VERSION, _genie_version(), text)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def artifact_path(name, text, cache_dir=DEFAULT_CACHE_DIR):
+    return os.path.join(cache_dir, '{}-{}.json'.format(name, markup_digest(text)))
+
+
+def load_artifact(path):
+    '''Return the artifact stored at path, or None if missing or stale.'''
+    try:
+        with open(path) as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if artifact.get('version') != CACHE_FORMAT_VERSION or \
+       artifact.get('genie_version') != _genie_version():
+        return None
+    return artifact
+
+
+def save_artifact(artifact, path):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(artifact, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # Read-only installs still work, they just recompile every time
+        log.debug('Could not write markup cache {}: {}'.format(path, e))
+
+
+def register_artifact(artifact):
+    '''Register a compiled artifact through the public parsergen.extend().'''
+    pg.extend(show_cmds=artifact['show_cmds'],
+              regex_ext=artifact['regex'],
+              regex_tags=artifact['regex_tags'])
+    for os_, regexes in artifact['regex'].items():
+        _registered.setdefault(os_, {}).update(regexes)
+
+
+def extend_markup_cached(text, name, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+    '''Drop-in for parsergen.extend_markup() backed by a compiled artifact.
+
+    Returns the artifact that was registered, or None when the parsergen
+    registries cannot be read with this genie release; the markup is then
+    registered through parsergen.extend_markup() as without the cache.
+    '''
+    if not registries.available():
+        log.warning('parsergen registries not found, markup {} is not '
+                    'cached'.format(name))
+        pg.extend_markup(text)
+        return None
+
+    path = artifact_path(name, text, cache_dir)
+    artifact = None if refresh else load_artifact(path)
+    if artifact is None:
+        artifact = compile_markup(text)
+        save_artifact(artifact, path)
+        for os_, regexes in artifact['regex'].items():
+            _registered.setdefault(os_, {}).update(regexes)
+    else:
+        register_artifact(artifact)
+    return artifact
+
+
+@functools.lru_cache(maxsize=None)
+def pattern(os_, tag):
+    '''Compiled regex of a tag registered through this module, on first use.'''
+    return re.compile(_registered[os_][tag])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompile parsergen markup')
+    parser.add_argument('--refresh', action='store_true',
+                        help='drop existing artifacts and recompile')
+    args = parser.parse_args()
+
+    if args.refresh and os.path.isdir(DEFAULT_CACHE_DIR):
+        for artifact_file in os.listdir(DEFAULT_CACHE_DIR):
+            if artifact_file.startswith('parsergen_demo_mkpg-'):
+                os.remove(os.path.join(DEFAULT_CACHE_DIR, artifact_file))
+
+    # Importing the markup module compiles (or loads) its artifact
+    from genie.parsergen.examples.parsergen.pyAts import parsergen_demo_mkpg
+    artifact = parsergen_demo_mkpg.markup_artifact
+    if artifact is None:
+        raise SystemExit('parsergen registries not found, nothing to cache')
+    print('{} regex tags for {} in {}'.format(
+        sum(len(tags) for tags in artifact['regex_tags'].values()),
+        ', '.join(sorted(artifact['regex_tags'])), DEFAULT_CACHE_DIR))
@@ -26,35 +26,12 @@ import re
 import logging
 from genie import parsergen as pg
 from genie.parsergen.examples.parsergen.pyAts import parsergen_demo_mkpg
+from genie.parsergen.examples.parsergen.pyAts.struct_diff import StructDiff
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 parameters = {}
 
-#http://code.activestate.com/recipes/576644-diff-two-dictionaries/
-class DictDiffer(object):
-  """
-  Calculate the difference between two dictionaries as:
-  (1) items added
-  (2) items removed
-  (3) keys same in both but changed values
-  (4) keys same in both and unchanged values
-  """
-  def __init__(self, current_dict, past_dict):
-    self.current_dict, self.past_dict = current_dict, past_dict
-    self.set_current, self.set_past = set(current_dict.keys()), set(past_dict.keys())
-    self.intersect = self.set_current.intersection(self.set_past)
-  def added(self):
-    return self.set_current - self.intersect
-  def removed(self):
-    return self.set_past - self.intersect
-  def changed(self):
-    return set(o for o in self.intersect if self.past_dict[o] != self.current_dict[o])
-  def unchanged(self):
-    return set(o for o in self.intersect if self.past_dict[o] == self.current_dict[o])
-
-
-
 ###################################################################
 ###                  COMMON SETUP SECTION                       ###
 ###################################################################
@@ -173,7 +150,7 @@ class tc_one(aetest.Testcase):
             if result:
                 parseresult_python = pg.ext_dictio[uut.myuut.name]
                 log.info("Parsing details : {}".format(parseresult_python))
-                diff = DictDiffer(parseresult_python, parseresult_tcl)
+                diff = StructDiff(parseresult_python, parseresult_tcl)
                 log.info("\nTCL vs Python parse comparison analysis:")
                 log.info("\nKeys present in TCL but not present in Python : {}".
                     format(diff.removed()))
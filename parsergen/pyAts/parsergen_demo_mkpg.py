@@ -1,5 +1,7 @@
 from genie import parsergen as pg
 
+from . import markup_cache
+
 marked_up_show_interface_xrvr_output = '''\
 OS: iosxr
 
@@ -403,7 +405,10 @@ Interface XXX<[-A-Za-z0-9\.+/]+><if_name>XXXGi0/0/0/0:
 
 '''
 
-pg.extend_markup(marked_up_show_interface_xrvr_output)
+# Registered from a precompiled artifact, the markup is only translated into
+# regexes when it changed (see markup_cache.py)
+markup_artifact = markup_cache.extend_markup_cached(
+    marked_up_show_interface_xrvr_output, 'parsergen_demo_mkpg')
 
 show_cmds = {
     'iosxr': {
@@ -0,0 +1,68 @@
+'''registries.py
+
+Read access to the show commands and regexes registered with parsergen.
+
+parsergen.extend() and extend_markup() store what they register in module
+level dicts (_glb_show_commands, _glb_regex and _glb_regex_tags) that have no
+public getter. Older genie releases define them in genie.parsergen itself,
+newer ones in genie.parsergen._parsergen, which genie.parsergen star-imports
+without its underscore names. parsergen_module() finds whichever module holds
+them; callers fall back to their uncached path when it returns None.
+'''
+
+import functools
+
+from genie import parsergen as pg
+
+
+@functools.lru_cache(maxsize=None)
+def parsergen_module():
+    '''Module holding parsergen's registries, None if not found.'''
+    try:
+        from genie.parsergen import _parsergen
+    except ImportError:
+        _parsergen = None
+    for module in (pg, _parsergen):
+        if module is not None and hasattr(module, '_glb_show_commands') and \
+           hasattr(module, '_glb_regex') and hasattr(module, '_glb_regex_tags'):
+            return module
+    return None
+
+
+def available():
+    return parsergen_module() is not None
+
+
+def _module():
+    module = parsergen_module()
+    if module is None:
+        raise LookupError('parsergen registries not found in this genie release')
+    return module
+
+
+def show_commands():
+    '''{os: {command key: show command template}}, the live registry.'''
+    return _module()._glb_show_commands
+
+
+def regexes():
+    '''{os: {regex tag: regex}}, the live registry.'''
+    return _module()._glb_regex
+
+
+def regex_tags():
+    '''{os: [regex tag, ...]} in registration order, the live registry.'''
+    return _module()._glb_regex_tags
+
+
+def snapshot():
+    '''Copy of the three registries, regexes as pattern strings.
+
+    Suitable for parsergen.extend(show_cmds=, regex_ext=, regex_tags=) in
+    another process.
+    '''
+    return ({os_: dict(cmds) for os_, cmds in show_commands().items()},
+            {os_: {tag: getattr(regex, 'pattern', regex)
+                   for tag, regex in tags.items()}
+             for os_, tags in regexes().items()},
+            {os_: list(tags) for os_, tags in regex_tags().items()})
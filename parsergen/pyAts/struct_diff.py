@@ -0,0 +1,144 @@
+'''struct_diff.py
+
+Structural diff of parser results.
+
+StructDiff is a drop-in for the DictDiffer recipe the demos used to compare
+the TCL and parsergen results: added(), removed(), changed() and unchanged()
+return the same sets of top-level keys. It also reports where nested results
+differ, as (path, kind, current, past) tuples, path being the tuple of keys
+and list indexes leading to the difference:
+
+    diff = StructDiff(parseresult_python, parseresult_tcl)
+    diff.removed()
+    for path, kind, current, past in diff.differences():
+        ...
+
+It stays fast on large parse trees by letting Python compare in C wherever
+possible:
+
+  - key sets are compared through dict key views, which are hashed sets,
+  - equal values and subtrees are skipped after a single == comparison,
+    which stops at the first difference, so only differing branches are
+    walked,
+  - the walk is iterative, so deep trees do not hit the recursion limit,
+    and stops once limit differences are found,
+  - bool(diff) only tells whether anything differs, with a single ==.
+'''
+
+import time
+import argparse
+from collections.abc import Mapping
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+
+def _is_sequence(value):
+    return isinstance(value, (list, tuple))
+
+
+class StructDiff(object):
+    '''Difference between two parse results, current and past.'''
+
+    def __init__(self, current_dict, past_dict):
+        self.current_dict, self.past_dict = current_dict, past_dict
+        self._changed = None
+
+    def __bool__(self):
+        return self.current_dict != self.past_dict
+
+    def added(self):
+        return set(self.current_dict.keys() - self.past_dict.keys())
+
+    def removed(self):
+        return set(self.past_dict.keys() - self.current_dict.keys())
+
+    def changed(self):
+        if self._changed is None:
+            current, past = self.current_dict, self.past_dict
+            self._changed = set(key for key in current.keys() & past.keys()
+                                if current[key] != past[key])
+        return self._changed
+
+    def unchanged(self):
+        return set(self.current_dict.keys() & self.past_dict.keys()) - self.changed()
+
+    def differences(self, limit=None):
+        '''[(path, kind, current, past)] of every nested difference.
+
+        kind is ADDED (past is None), REMOVED (current is None) or CHANGED.
+        Stops after limit differences when given.
+        '''
+        found = []
+        if limit is not None and limit <= 0:
+            return found
+        stack = [((), self.current_dict, self.past_dict)]
+        while stack:
+            path, current, past = stack.pop()
+            if isinstance(current, Mapping) and isinstance(past, Mapping):
+                for key in current.keys() - past.keys():
+                    found.append((path + (key,), ADDED, current[key], None))
+                for key in past.keys() - current.keys():
+                    found.append((path + (key,), REMOVED, None, past[key]))
+                pairs = ((key, current[key], past[key])
+                         for key in current.keys() & past.keys())
+            elif _is_sequence(current) and _is_sequence(past):
+                for index in range(len(past), len(current)):
+                    found.append((path + (index,), ADDED, current[index], None))
+                for index in range(len(current), len(past)):
+                    found.append((path + (index,), REMOVED, None, past[index]))
+                pairs = zip(range(len(current)), current, past)
+            else:
+                found.append((path, CHANGED, current, past))
+                pairs = ()
+            for key, value, other in pairs:
+                if value is not other and value != other:
+                    stack.append((path + (key,), value, other))
+            if limit is not None and len(found) >= limit:
+                return found[:limit]
+        return found
+
+
+def diff(current, past, limit=None):
+    '''Shortcut for StructDiff(current, past).differences(limit).'''
+    return StructDiff(current, past).differences(limit)
+
+
+def format_path(path):
+    return ''.join('[{!r}]'.format(key) for key in path)
+
+
+#
+# Benchmark on large parse trees
+#
+def synthetic_tree(interfaces, counters=20):
+    '''A show interface like result: interfaces x counters leaf keys.'''
+    return {'Ethernet1/{}'.format(n): {
+                'oper_status': 'up', 'mtu': 1500,
+                'ipv4': {'10.{}.{}.1/24'.format(n >> 8, n & 255): {'secondary': False}},
+                'counters': {'counter_{}'.format(c): n * c for c in range(counters)}}
+            for n in range(interfaces)}
+
+
+if __name__ == '__main__':
+    import copy
+
+    parser = argparse.ArgumentParser(description='Structural diff benchmark')
+    parser.add_argument('-interfaces', type=int, default=5000)
+    custom_args = parser.parse_known_args()[0]
+
+    past = synthetic_tree(custom_args.interfaces)
+    current = copy.deepcopy(past)
+    last = 'Ethernet1/{}'.format(custom_args.interfaces - 1)
+    current[last]['counters']['counter_3'] += 1
+    current[last]['description'] = 'uplink'
+    del current['Ethernet1/0']
+
+    start = time.perf_counter()
+    differences = diff(current, past)
+    elapsed = time.perf_counter() - start
+    for path, kind, value, other in differences:
+        print('{:8} {} {!r} -> {!r}'.format(kind, format_path(path), other, value))
+    print('{} keys diffed in {:.1f} ms'.format(
+        custom_args.interfaces * 25, elapsed * 1e3))
@@ -0,0 +1,250 @@
+#!/bin/env python
+'''Offline parser benchmark and throughput regression check.
+
+The corpus is built from:
+  - the ACTUAL: output of every markup block in parsergen_demo_mkpg.py,
+    parsed with parsergen.oper_fill() and the regexes of its MARKUP:,
+  - the device outputs recorded in the unicon logs metaparser/*_output,
+    parsed with the genie parser the metaparser demos use.
+
+Markup outputs are scaled synthetically (the output repeated for N
+interfaces, the one looked up last) to measure large outputs. Every
+entry is parsed on a mocked device, like the other scripts of this
+directory, and its best time, throughput and peak allocations are
+reported per OS/command.
+
+Examples:
+python benchmark_corpus.py -scale 1000 -save_baseline
+python benchmark_corpus.py -scale 1000 -threshold 0.2
+
+With a baseline, the script exits with status 1 when the throughput of
+any entry dropped by more than the threshold.
+'''
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import importlib
+import tracemalloc
+
+python3 = sys.version_info >= (3,0)
+
+if python3:
+    from unittest.mock import Mock
+    from unittest.mock import patch
+else:
+    from mock import Mock
+    from mock import patch
+
+ats_mock = Mock()
+with patch.dict('sys.modules',
+        {'ats' : ats_mock}):
+    from genie import parsergen
+    from genie.parsergen import oper_fill
+
+    from genie.parsergen.examples.parsergen.pyAts import parsergen_demo_mkpg
+    from genie.parsergen.examples.parsergen.pyAts import registries
+    from genie.parsergen.examples.parsergen.pyAts.markup_cache import split_markup
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+METAPARSER_DIR = os.path.join(HERE, '..', '..', 'metaparser')
+METAPARSER_LOGS = [os.path.join(METAPARSER_DIR, name) for name in
+                   ('demo_metaparser_nxos_output', 'demo_metaparser_iosxe_output')]
+
+# The metaparser scripts are not a package, their demos import each other
+# from their directory
+sys.path.insert(0, METAPARSER_DIR)
+from replay_device import read_unicon_log
+
+BASELINE_FILE = os.path.join(HERE, 'benchmark_baseline.json')
+
+# Genie parser for the commands recorded in the metaparser logs
+LOG_PARSERS = {
+    'show bgp process vrf all': ('nxos', 'genie.libs.parser.nxos.show_bgp',
+                                 'ShowBgpProcessVrfAll'),
+    'show interfaces': ('iosxe', 'genie.libs.parser.iosxe.show_interface',
+                        'ShowInterfaces'),
+}
+# Field marker left in an ACTUAL: section, e.g. XW<if_name>X
+_MARKER = re.compile(r'X[A-Za-z]<[^<>]+>X')
+
+
+#
+# Corpus
+#
+def markup_entries():
+    '''One entry per markup block of parsergen_demo_mkpg.py.
+
+    The first field selects the section, like if_name in the demos. The
+    other fields are listed explicitly rather than through
+    regex_tag_fill_pattern, keeping only those matching a single line of
+    that section: oper_fill() fails on a field matching none or several,
+    like the aireos "STATE ...." fields.
+    '''
+    entries = []
+    for block in split_markup(parsergen_demo_mkpg.marked_up_show_interface_xrvr_output):
+        os_ = block['os'].lower()
+        output = _MARKER.sub('', block['actual'])
+        tags = [tag for tag in registries.regex_tags()[os_]
+                if tag.startswith(block['prefix'] + '.')]
+        patterns = [getattr(regex, 'pattern', regex) for regex in
+                    (registries.regexes()[os_][tag] for tag in tags)]
+        sections = list(re.finditer(patterns[0], output, re.M))
+        attr_vals = []
+        if sections:
+            end = sections[1].start() if len(sections) > 1 else len(output)
+            section = output[sections[0].start():end]
+            attr_vals.append([tags[0], sections[0].group(1)])
+            attr_vals.extend([tag, None] for tag, pattern in zip(tags[1:], patterns[1:])
+                             if len(re.findall(pattern, section, re.M)) == 1)
+        entries.append({
+            'kind': 'markup', 'os': os_, 'command': block['cmd'],
+            'prefix': block['prefix'], 'output': output,
+            'attr_vals': attr_vals})
+    return entries
+
+
+def log_entries(paths=METAPARSER_LOGS):
+    '''One entry per recorded command that has a parser in LOG_PARSERS.'''
+    entries = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        outputs = dict(read_unicon_log(path))
+        for command, (os_, module, cls) in LOG_PARSERS.items():
+            if command in outputs:
+                entries.append({
+                    'kind': 'metaparser', 'os': os_, 'command': command,
+                    'parser': [module, cls], 'output': outputs[command]})
+    return entries
+
+
+def build_corpus():
+    return markup_entries() + log_entries()
+
+
+def scaled(entry, scale):
+    '''Output of entry repeated for scale interfaces, the target one last.'''
+    if entry['kind'] != 'markup' or scale <= 1 or not entry['attr_vals']:
+        return entry['output']
+    value = entry['attr_vals'][0][1]
+    others = ''.join(entry['output'].replace(value, '{}{}'.format(value, n))
+                     for n in range(1, scale))
+    return others + entry['output']
+
+
+#
+# Parsing on a mocked device
+#
+def mocked_device(os_, outputs):
+    device_kwargs = {'is_connected.return_value':True,
+            'execute.side_effect': lambda command, *args, **kwargs:
+                outputs.get(command, outputs[None])}
+    device = Mock(**device_kwargs)
+    device.name = 'bench-{}'.format(os_)
+    device.os = os_
+    return device
+
+
+def parser_for(entry, output):
+    '''Return a callable parsing output the way entry describes.'''
+    if entry['kind'] == 'markup':
+        device = mocked_device(entry['os'], {None: output})
+        args = (entry['command'], [], {'ifname': ''})
+        # oper_fill() wants (tag, value) tuples, the corpus file has lists
+        attr_vals = [tuple(pair) for pair in entry['attr_vals']]
+
+        def parse():
+            pgfill = oper_fill(device, args, attr_vals, refresh_cache=True)
+            if not pgfill.parse():
+                raise ValueError(str(pgfill))
+            return parsergen.ext_dictio.pop(device.name, None)
+        return parse
+
+    module, cls = entry['parser']
+    parser_class = getattr(importlib.import_module(module), cls)
+    device = mocked_device(entry['os'], {None: output, entry['command']: output})
+    return lambda: parser_class(device=device).parse()
+
+
+def measure(entry, scale, repeat):
+    output = scaled(entry, scale)
+    parse = parser_for(entry, output)
+    parse()
+
+    best = min(_timed(parse) for _ in range(repeat))
+    tracemalloc.start()
+    parse()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'bytes': len(output), 'seconds': best,
+            'throughput': len(output) / best, 'peak_bytes': peak}
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def entry_name(entry, scale):
+    return '{}/{}/x{}'.format(entry['os'], entry['command'],
+                              scale if entry['kind'] == 'markup' else 1)
+
+
+#
+# Main
+#
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline parser benchmark')
+    parser.add_argument('-scale', type=int, default=100,
+                        help='interfaces in the scaled markup outputs')
+    parser.add_argument('-repeat', type=int, default=5)
+    parser.add_argument('-baseline', default=BASELINE_FILE)
+    parser.add_argument('-save_baseline', action='store_true',
+                        help='record this run as the new baseline')
+    parser.add_argument('-threshold', type=float, default=0.2,
+                        help='allowed throughput drop against the baseline')
+    parser.add_argument('-corpus_file',
+                        help='also write the extracted corpus to this file')
+    custom_args = parser.parse_known_args()[0]
+
+    corpus = build_corpus()
+    if custom_args.corpus_file:
+        with open(custom_args.corpus_file, 'w') as f:
+            json.dump(corpus, f, indent=1)
+
+    baseline = {}
+    if not custom_args.save_baseline and os.path.exists(custom_args.baseline):
+        with open(custom_args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for entry in corpus:
+        name = entry_name(entry, custom_args.scale)
+        results[name] = result = measure(entry, custom_args.scale, custom_args.repeat)
+        line = '{:<55} {:8.1f} KB {:8.2f} ms {:8.2f} MB/s peak {:8.1f} KB'.format(
+            name, result['bytes'] / 1e3, result['seconds'] * 1e3,
+            result['throughput'] / 1e6, result['peak_bytes'] / 1e3)
+        if name in baseline:
+            change = result['throughput'] / baseline[name]['throughput'] - 1
+            line += ' {:+6.1%}'.format(change)
+            if change < -custom_args.threshold:
+                regressions.append(name)
+                line += ' REGRESSION'
+        print(line)
+
+    if custom_args.save_baseline:
+        with open(custom_args.baseline, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print("\nBaseline saved to {}".format(custom_args.baseline))
+
+    if regressions:
+        print("\nTest failed: throughput dropped more than {:.0%} for {}".format(
+            custom_args.threshold, ', '.join(regressions)))
+        sys.exit(1)
+    print ("\nTest passed")
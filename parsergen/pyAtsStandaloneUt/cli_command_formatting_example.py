@@ -19,6 +19,8 @@ with patch.dict('sys.modules',
     from genie.parsergen import oper_fill
 
     from genie.parsergen.examples.parsergen.pyAts import parsergen_demo_mkpg
+    from genie.parsergen.examples.parsergen.pyAts.command_templates import \
+        templates
 
 
 
@@ -139,4 +141,24 @@ print("The following commands were just executed on the NXOS device : {}".
 
 
 
+#
+# The same commands, formatted ahead of time for many interfaces:
+#
 
+print("\n\n*** Compiled CLI command templates. ***\n\n")
+
+# Each (os, key) template is compiled once, and each resolved command is
+# remembered per argument tuple.
+interfaces = ['GigabitEthernet0/0/0/{}'.format(n) for n in range(1000)]
+for os_ in ('iosxr', 'nxos'):
+    commands = [templates.format(os_, 'SHOW_IP_INTF', [None, ifname])
+                for ifname in interfaces]
+    commands += [templates.format(os_, 'SHOW_IP_INTF2', [], {'if-name' : ifname})
+                 for ifname in interfaces]
+    print("{} commands for {}, e.g. '{}' and '{}'".format(
+        len(commands), os_, commands[1], commands[-1]))
+
+# Formatting again only hits the memoized commands
+for ifname in interfaces:
+    templates.format('iosxr', 'SHOW_IP_INTF', [None, ifname])
+print(templates.stats())
@@ -4,6 +4,8 @@ import matplotlib.pyplot as plt
 import re
 from ipaddress import ip_network
 
+from dnsEnrich import enrich, annotate_graph
+
 def get_cdp_neighbor_details(device):
     """Fetch neighbor details (hostname, IP, ports) from 'show cdp neighbors detail'."""
     try:
@@ -90,6 +92,8 @@ seed_ips = ['172.31.200.2', '172.31.200.3']  # List of starting IPs
 subnet =  None # Subnet to scan (set to None if using seed_ips only)
 
 graph = build_cisco_topology(seed_ips, username, password, subnet=subnet)
+# Reverse-resolve every discovered node IP in one parallel batch
+annotate_graph(graph, enrich(graph.nodes))
 pos = nx.spring_layout(graph)
 nx.draw(graph, pos, with_labels=True, labels=nx.get_node_attributes(graph, 'label'), node_color='lightblue', node_size=500)
 edge_labels = {(u, v): f"{d['local_port']} -> {d['neighbor_port']}" for u, v, d in graph.edges(data=True)}
@@ -0,0 +1,58 @@
+import json
+import socket
+
+import pytest
+
+from dnsEnrich import annotate_records, enrich, load_hostname_map
+from dnsResolver import StubDnsServer
+
+RECORDS = {'10.1.1.1': 'sw1.lab', '10.1.1.2': 'sw2.lab'}
+
+
+@pytest.fixture
+def stub():
+    with StubDnsServer(RECORDS) as server:
+        yield server
+
+
+@pytest.fixture
+def silent_port():
+    """A bound UDP port that never answers, like an unreachable nameserver."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def test_enrich_dedupes_and_persists(stub, tmp_path):
+    map_file = str(tmp_path / 'names.json')
+    values = ['10.1.1.1', ' 10.1.1.1', 'not an ip', '10.1.1.2', '10.9.9.9']
+    names = enrich(values, map_file=map_file, nameservers=['127.0.0.1'],
+                   port=stub.port)
+
+    assert names == {'10.1.1.1': 'sw1.lab', '10.1.1.2': 'sw2.lab',
+                     '10.9.9.9': None}
+    # The unknown IP is negative-cached
+    assert load_hostname_map(map_file)['10.9.9.9']['hostname'] is None
+
+    queries = len(stub.queries)
+    assert enrich(values, map_file=map_file, nameservers=['127.0.0.1'],
+                  port=stub.port) == names
+    assert len(stub.queries) == queries
+
+
+def test_enrich_does_not_persist_timeouts(silent_port, tmp_path):
+    map_file = str(tmp_path / 'names.json')
+    names = enrich(['10.1.1.1'], map_file=map_file, nameservers=['127.0.0.1'],
+                   port=silent_port, timeout=0.05, retries=0)
+
+    assert names == {'10.1.1.1': None}
+    with open(map_file) as map_f:
+        assert json.load(map_f) == {}
+
+
+def test_annotate_records():
+    records = [{'ip': '10.1.1.1'}, {'ip': '10.9.9.9'}]
+    annotate_records(records, {'10.1.1.1': 'sw1.lab', '10.9.9.9': None})
+    assert records == [{'ip': '10.1.1.1', 'dns_name': 'sw1.lab'},
+                       {'ip': '10.9.9.9'}]
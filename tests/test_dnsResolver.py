@@ -0,0 +1,62 @@
+import asyncio
+import ipaddress
+
+import pytest
+
+from dnsResolver import (AsyncResolver, QTYPE_PTR, StubDnsServer, TTLCache,
+                         _DnsProtocol, ptr_name, resolve_all)
+
+RECORDS = {'10.1.1.1': 'sw1.lab', '10.1.1.2': 'sw2.lab'}
+
+
+@pytest.fixture
+def stub():
+    with StubDnsServer(RECORDS) as server:
+        yield server
+
+
+def test_resolve_all(stub):
+    results = resolve_all(['10.1.1.1', '10.9.9.9'], nameservers=['127.0.0.1'],
+                          port=stub.port)
+    assert results[0]['hostname'] == 'sw1.lab'
+    assert results[0]['addresses'] == ['10.1.1.1']
+    assert results[1]['hostname'] is None
+    assert results[1]['addresses'] == ['10.9.9.9']
+
+
+def test_concurrent_lookups_share_one_query(stub):
+    async def run():
+        async with AsyncResolver(nameservers=['127.0.0.1'], port=stub.port) as resolver:
+            return await resolver.lookup_many(['10.1.1.1'] * 20)
+
+    results = asyncio.run(run())
+    assert {result['hostname'] for result in results} == {'sw1.lab'}
+    assert stub.queries.count((ptr_name('10.1.1.1'), QTYPE_PTR)) == 1
+
+
+def test_ttl_cache_evicts_expired_entries():
+    cache = TTLCache(purge_interval=0)
+    cache.set('old', ['a'], ttl=-1)
+    cache.set('new', ['b'], ttl=60)
+    assert len(cache) == 1
+    assert cache.get('new') == ['b']
+
+    cache = TTLCache()
+    cache.set('old', ['a'], ttl=-1)
+    assert cache.get('old') is None
+    assert len(cache) == 0
+
+
+def test_reply_from_other_source_is_ignored():
+    async def run():
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = {7: (future, (ipaddress.ip_address('127.0.0.1'), 53))}
+        protocol = _DnsProtocol(pending)
+        reply = bytes.fromhex('000781800000000000000000')
+        protocol.datagram_received(reply, ('127.0.0.2', 53))
+        assert not future.done() and 7 in pending
+        protocol.datagram_received(reply, ('127.0.0.1', 53))
+        return future.result()
+
+    assert asyncio.run(run()) == (0, [])
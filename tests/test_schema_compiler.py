@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+
+schemaengine = pytest.importorskip('genie.metaparser.util.schemaengine')
+from genie.metaparser.util.schemaengine import (Any, And, ListOf, Optional,
+                                                Or, Schema, Use)
+
+# The metaparser scripts import each other from their directory
+METAPARSER_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'metaparser')
+sys.path.insert(0, METAPARSER_DIR)
+
+from parser_index import index
+from replay_device import read_results
+from schema_compiler import compile_schema
+
+
+def outcome(validate, data):
+    """('ok', result) or ('error', None), to compare both validators."""
+    try:
+        return 'ok', validate(data)
+    except Exception:
+        return 'error', None
+
+
+def assert_same(schema, data):
+    # A fresh genie Schema each time, its nested Schema objects keep state
+    expected = outcome(Schema(schema).validate, data)
+    assert outcome(compile_schema(schema), data) == expected
+    return expected
+
+
+@pytest.mark.parametrize('log, command, os_', [
+    ('demo_metaparser_nxos_output', 'show bgp process vrf all', 'nxos'),
+    ('demo_metaparser_nxos_output', 'show bgp process vrf all | xml', 'nxos'),
+    ('demo_metaparser_iosxe_output', 'show interfaces', 'iosxe'),
+])
+def test_demo_results(log, command, os_):
+    result = read_results(os.path.join(METAPARSER_DIR, log))[command]
+    parser_class = index.parser_class(command.split(' |')[0], os_)
+    assert assert_same(parser_class.schema, result) == ('ok', result)
+
+
+def test_demo_result_errors():
+    command = 'show bgp process vrf all'
+    result = read_results(os.path.join(
+        METAPARSER_DIR, 'demo_metaparser_nxos_output'))[command]
+    schema = index.parser_class(command, 'nxos').schema
+    assert assert_same(schema, dict(result, bgp_pid='1'))[0] == 'error'
+    assert assert_same(schema, dict(result, unexpected=1))[0] == 'error'
+
+
+@pytest.mark.parametrize('data', [{'count': '5'}, {'count': 5},
+                                  {'count': 'five'}, {'count': None}])
+def test_conversions(data):
+    assert_same({'count': Use(int)}, data)
+    assert_same({'count': And(str, Use(int))}, data)
+    assert_same({'count': Or(int, Use(int))}, data)
+
+
+@pytest.mark.parametrize('data', [{'a': 1}, {'b': 1}, {'a': 1, 'b': 2},
+                                  {'c': 1}, {'a': 'x'}])
+def test_or_keys(data):
+    assert_same({Or('a', 'b'): int}, data)
+    assert_same({Optional(Or('a', 'b')): int, Optional('c'): int}, data)
+
+
+@pytest.mark.parametrize('data', [{'name': 'x'}, {'name': 1},
+                                  {'name': 'x', 'other': 1},
+                                  {'other': 'x'}])
+def test_optional_keys_and_wildcards(data):
+    assert_same({Optional('name'): str, Any(): int}, data)
+    assert_same({Any(): int, Optional('name'): str}, data)
+    assert_same({Optional('name'): str, Optional(Any()): int}, data)
+
+
+@pytest.mark.parametrize('data', [{'l': [{'a': 1}, {'a': 2}]}, {'l': []},
+                                  {'l': [{'a': 'x'}]}, {'l': ({'a': 1},)},
+                                  {'l': [1]}, {'l': [int]}])
+def test_list_of_and_plain_lists(data):
+    assert_same({'l': ListOf({'a': int})}, data)
+    assert_same({'l': [int]}, data)
+    assert_same({'l': list}, data)
+
+
+def test_empty_data_is_an_error():
+    assert assert_same({Optional('a'): int}, {}) == ('error', None)